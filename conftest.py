@@ -0,0 +1,12 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Каждый тест с чистым кешем: тест не коммитит транзакцию, и версии
+    страниц (posts.caching.bump_on_commit) в нем не меняются.
+    """
+    cache.clear()
+    yield
@@ -0,0 +1,142 @@
+"""
+Ресурсы API: поля, колонки БД под ними и встроенные объекты.
+
+Каждое поле знает, какие колонки ему нужны и какие связи надо
+подтянуть, поэтому по параметру fields= запрос выбирает только колонки
+запрошенных полей (only()), а автор и группа приходят тем же запросом
+через select_related.
+"""
+from collections import namedtuple
+
+Field = namedtuple('Field', 'columns related get')
+
+AUTHOR_COLUMNS = (
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+)
+
+
+class UnknownFields(ValueError):
+    pass
+
+
+class Resource:
+    def __init__(self, fields, default, keys):
+        self.fields = fields
+        self.default = default
+        # Ключи паджинации, см. core.paginator.KeysetPaginator.
+        self.keys = keys
+
+    def parse_fields(self, value):
+        """Имена полей из параметра fields=; без него — поля по умолчанию."""
+        if not value:
+            return list(self.default)
+        names = list(dict.fromkeys(
+            name.strip() for name in value.split(',') if name.strip()
+        ))
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise UnknownFields(', '.join(sorted(unknown)))
+        return names
+
+    def select(self, queryset, names):
+        """Запрос только за колонками полей names и ключей паджинации."""
+        columns = {key.lstrip('-') for key in self.keys} - {'pk'}
+        related = set()
+        for name in names:
+            columns.update(self.fields[name].columns)
+            related.update(self.fields[name].related)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns or ['pk'])
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].get(obj) for name in names}
+
+
+def _author(user):
+    return {'username': user.username, 'name': user.get_full_name()}
+
+
+def _group(post):
+    if post.group is None:
+        return None
+    return {'slug': post.group.slug, 'title': post.group.title}
+
+
+POST = Resource(
+    fields={
+        'id': Field((), (), lambda post: post.pk),
+        'text': Field(('text',), (), lambda post: post.text),
+        'html': Field(
+            ('text_html', 'text_html_version'), (), lambda post: post.html
+        ),
+        'pub_date': Field(
+            ('pub_date',), (), lambda post: post.pub_date.isoformat()
+        ),
+        'image': Field(
+            ('image',), (),
+            lambda post: post.image.url if post.image else None
+        ),
+        'comments_count': Field(
+            ('comments_count',), (), lambda post: post.comments_count
+        ),
+        'author': Field(
+            AUTHOR_COLUMNS, ('author',), lambda post: _author(post.author)
+        ),
+        'group': Field(
+            ('group', 'group__slug', 'group__title'), ('group',), _group
+        ),
+    },
+    default=(
+        'id', 'text', 'pub_date', 'image', 'comments_count', 'author',
+        'group',
+    ),
+    keys=('-pub_date', '-pk'),
+)
+
+COMMENT = Resource(
+    fields={
+        'id': Field((), (), lambda comment: comment.pk),
+        'post': Field(('post',), (), lambda comment: comment.post_id),
+        'text': Field(('text',), (), lambda comment: comment.text),
+        'created': Field(
+            ('created',), (), lambda comment: comment.created.isoformat()
+        ),
+        'author': Field(
+            AUTHOR_COLUMNS, ('author',),
+            lambda comment: _author(comment.author)
+        ),
+    },
+    default=('id', 'post', 'text', 'created', 'author'),
+    keys=('-created', '-pk'),
+)
+
+GROUP = Resource(
+    fields={
+        'slug': Field(('slug',), (), lambda group: group.slug),
+        'title': Field(('title',), (), lambda group: group.title),
+        'description': Field(
+            ('description',), (), lambda group: group.description
+        ),
+        'posts_count': Field(
+            ('posts_count',), (), lambda group: group.posts_count
+        ),
+    },
+    default=('slug', 'title', 'description', 'posts_count'),
+    keys=('pk',),
+)
+
+FOLLOW = Resource(
+    fields={
+        'id': Field((), (), lambda follow: follow.pk),
+        'author': Field(
+            AUTHOR_COLUMNS, ('author',),
+            lambda follow: _author(follow.author)
+        ),
+    },
+    default=('id', 'author'),
+    keys=('-pk',),
+)
@@ -0,0 +1,199 @@
+"""
+API только для чтения: посты, группы, комментарии и подписки в JSON.
+
+Списки листаются по ключу (core.paginator.KeysetPaginator): ссылки
+next и previous несут непрозрачный cursor, а размер страницы задается
+?limit=. Параметр ?fields=id,text,author выбирает поля ответа, и из БД
+читаются только их колонки; автор и группа приходят тем же запросом.
+ETag те же, что у HTML-страниц (posts.caching), поэтому
+повторный запрос без изменений получает 304 без обращения к БД, а сам
+ответ читается только с реплики, догнавшей версию из ETag.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from core.db_router import read_from_replica
+from core.paginator import KeysetPaginator
+from posts import timeline
+from posts.caching import (
+    conditional_page, get_feed_version, index_version, post_version,
+)
+from posts.models import Comment, Follow, Group, Post
+from .resources import COMMENT, FOLLOW, GROUP, POST, UnknownFields
+
+User = get_user_model()
+FEED_KEYS = ('-pub_date', '-post_id')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def posts_version(*args, **kwargs):
+    """Списки постов: любые посты и счетчики комментариев в них."""
+    return get_feed_version('index', 'comments')
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def api_view(view):
+    """GET и HEAD, ошибки в JSON вместо HTML-страниц."""
+    @read_from_replica
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return _json({'detail': error.message}, status=error.status)
+        except Http404:
+            return _json({'detail': 'Не найдено.'}, status=404)
+    return wrapper
+
+
+def login_required(view):
+    """401 вместо перенаправления на страницу входа."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise ApiError(401, 'Нужна авторизация.')
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _fields(request, resource):
+    try:
+        return resource.parse_fields(request.GET.get('fields'))
+    except UnknownFields as error:
+        raise ApiError(400, f'Неизвестные поля: {error}')
+
+
+def _limit(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+        raise ApiError(
+            400, f'limit должен быть от 1 до {settings.API_MAX_PAGE_SIZE}.'
+        )
+    return limit
+
+
+def _page(request, queryset, keys):
+    paginator = KeysetPaginator(queryset, _limit(request), keys=keys)
+    cursor = request.GET.get('cursor')
+    if cursor and paginator.decode_cursor(cursor) is None:
+        raise ApiError(400, 'Неверный cursor.')
+    return paginator.get_page(cursor=cursor)
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'?{query.urlencode()}')
+
+
+def _listing(request, page, objects, resource, names):
+    return _json({
+        'results': [resource.serialize(obj, names) for obj in objects],
+        'next': _link(request, page.next_cursor),
+        'previous': _link(request, page.previous_cursor),
+    })
+
+
+def _list(request, resource, queryset):
+    names = _fields(request, resource)
+    page = _page(request, resource.select(queryset, names), resource.keys)
+    return _listing(request, page, page, resource, names)
+
+
+def _detail(request, resource, queryset, **lookup):
+    names = _fields(request, resource)
+    obj = get_object_or_404(resource.select(queryset, names), **lookup)
+    return _json(resource.serialize(obj, names))
+
+
+@api_view
+@conditional_page(posts_version)
+def post_list(request):
+    """Посты сайта; ?group=<slug> и ?author=<username> фильтруют ленту."""
+    posts = Post.objects.visible()
+    if 'group' in request.GET:
+        posts = posts.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    return _list(request, POST, posts)
+
+
+@api_view
+@conditional_page(post_version)
+def post_detail(request, post_id):
+    return _detail(request, POST, Post.objects.visible(), pk=post_id)
+
+
+@api_view
+@conditional_page(post_version)
+def comment_list(request, post_id):
+    """Комментарии видимого поста; сам пост ищется, только если их нет."""
+    names = _fields(request, COMMENT)
+    comments = Comment.objects.filter(post=post_id, post__is_deleted=False)
+    page = _page(request, COMMENT.select(comments, names), COMMENT.keys)
+    if not page.object_list:
+        get_object_or_404(Post.objects.visible(), pk=post_id)
+    return _listing(request, page, page, COMMENT, names)
+
+
+@api_view
+@conditional_page(index_version)
+def group_list(request):
+    return _list(request, GROUP, Group.objects.all())
+
+
+@api_view
+@conditional_page(index_version)
+def group_detail(request, slug):
+    return _detail(request, GROUP, Group.objects.all(), slug=slug)
+
+
+@api_view
+@login_required
+@conditional_page(posts_version)
+def feed(request):
+    """Лента подписок: страница записей ленты, затем посты одним запросом."""
+    names = _fields(request, POST)
+    page = _page(request, timeline.feed(request.user), FEED_KEYS)
+    posts = POST.select(Post.objects.visible(), names).in_bulk(
+        [entry.post_id for entry in page]
+    )
+    objects = [
+        posts[entry.post_id] for entry in page if entry.post_id in posts
+    ]
+    return _listing(request, page, objects, POST, names)
+
+
+@api_view
+@login_required
+@conditional_page(index_version)
+def follow_list(request):
+    """Авторы, на которых подписан текущий пользователь."""
+    return _list(
+        request, FOLLOW, Follow.objects.filter(user=request.user)
+    )
@@ -0,0 +1,190 @@
+"""
+ASGI-обертка над WSGI-приложением Django.
+
+Django 2.2 не умеет async views, поэтому view и все обращения к БД
+выполняются в пуле потоков, а асинхронно идут только прием тела
+запроса и отдача ответа. Медленный клиент или долгая загрузка картинки
+занимают корутину, а не поток пула.
+
+Все вызовы одного запроса (view, чтение потокового ответа и его
+закрытие) идут в одном и том же потоке: соединение с БД и курсоры
+потоковой выгрузки не переходят между потоками, а request_finished
+закрывает соединения в том потоке, где они открывались.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Тела запросов больше этого размера (загрузки картинок) пишутся на диск.
+BODY_IN_MEMORY = 1024 * 1024
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-scope ASGI; body — файл с телом запроса."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('127.0.0.1', 0)
+    # path содержит root_path (адрес, куда смонтировано приложение), а
+    # WSGI ждет его отдельно в SCRIPT_NAME.
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode().decode('latin1'),
+        'PATH_INFO': path.encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+class AsgiHandler:
+    """
+    ASGI-приложение, выполняющее WSGI-приложение в пуле потоков.
+
+    Пул — это max_workers однопоточных исполнителей: запрос занимает
+    один из них целиком, от вызова view до закрытия ответа.
+    """
+
+    def __init__(self, wsgi_application, max_workers=None, executors=None):
+        self.wsgi_application = wsgi_application
+        if executors is None:
+            count = max_workers or min(32, (os.cpu_count() or 1) + 4)
+            executors = [
+                ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f'asgi-{i}'
+                )
+                for i in range(count)
+            ]
+        self.executors = executors
+        self._idle = list(executors)
+        # Семафор создается при первом запросе: до Python 3.10 он
+        # привязывается к текущему циклу событий, а при импорте это еще
+        # не цикл сервера.
+        self._slots = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип scope: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for executor in self.executors:
+                    executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса целиком или None, если клиент отключился."""
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_IN_MEMORY)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def call_application(self, environ):
+        """
+        Выполняется в потоке пула: (статус, заголовки, тело, итератор).
+
+        Обычный ответ читается и закрывается здесь же, чтобы сигнал
+        request_finished закрыл соединение с БД в том же потоке, где оно
+        открывалось; потоковый ответ отдается итератором по кускам.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        if getattr(result, 'streaming', False):
+            return started['status'], started['headers'], None, result
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], body, None
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(len(self.executors))
+        async with self._slots:
+            executor = self._idle.pop()
+            try:
+                with body:
+                    await self.respond(executor, scope, body, send)
+            finally:
+                self._idle.append(executor)
+
+    async def respond(self, executor, scope, body, send):
+        """Выполняет запрос в потоке executor и отдает ответ клиенту."""
+        loop = asyncio.get_running_loop()
+        status, headers, content, streaming = await loop.run_in_executor(
+            executor, self.call_application, build_environ(scope, body)
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        if streaming is None:
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        chunks = iter(streaming)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    executor, next, chunks, None
+                )
+                if chunk is None:
+                    break
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body'})
+        finally:
+            await loop.run_in_executor(executor, streaming.close)
@@ -0,0 +1,95 @@
+"""
+Инструменты нагрузочных замеров: прогон запросов в потоках и сводка.
+
+Используются командами bench*, результаты — обычные словари, которые
+команды печатают как JSON, чтобы их можно было сравнивать между
+релизами.
+"""
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, q):
+    """Перцентиль q (0..100) методом ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, wall_time, queries=None, errors=0):
+    """Сводка прогона: задержки в мс, запросы к БД, запросы в секунду."""
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'wall_time_s': round(wall_time, 4),
+        'rps': round(len(latencies) / wall_time, 2) if wall_time else None,
+        'latency_ms': {
+            'p50': _ms(percentile(latencies, 50)),
+            'p95': _ms(percentile(latencies, 95)),
+            'p99': _ms(percentile(latencies, 99)),
+            'mean': _ms(statistics.mean(latencies)) if latencies else None,
+            'max': _ms(max(latencies)) if latencies else None,
+        },
+    }
+    if queries is not None:
+        summary['queries_per_request'] = {
+            'mean': round(statistics.mean(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        }
+    return summary
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def run_concurrent(make_worker, total, concurrency, count_queries=True):
+    """
+    Выполняет total вызовов в concurrency потоках и возвращает сводку.
+
+    make_worker() вызывается один раз в каждом потоке и возвращает
+    функцию одного запроса; она должна вернуть True при успехе. Так
+    у каждого потока свой клиент и своё соединение с БД.
+    """
+    local = threading.local()
+    latencies, queries = [], []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(_):
+        nonlocal errors
+        if not hasattr(local, 'worker'):
+            local.worker = make_worker()
+        capture = (
+            CaptureQueriesContext(connection) if count_queries
+            else nullcontext()
+        )
+        with capture as captured:
+            started = time.perf_counter()
+            ok = local.worker()
+            elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if count_queries:
+                queries.append(len(captured.captured_queries))
+            errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(total)))
+    wall_time = time.perf_counter() - started
+    return summarize(
+        latencies,
+        wall_time,
+        queries if count_queries else None,
+        errors
+    )
@@ -0,0 +1,217 @@
+"""
+Кеш Django в файле SQLite, общий для всех процессов одного хоста.
+
+В отличие от LocMemCache, все воркеры видят одни и те же ключи, поэтому
+сброс версии ленты в одном процессе сразу действует во всех, а данные не
+дублируются в памяти каждого воркера. Размер ограничен числом записей
+(MAX_ENTRIES) и суммарным объемом значений в байтах (MAX_SIZE); при
+превышении сначала удаляются просроченные записи, затем давно не
+читавшиеся (LRU).
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube_cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000, 'MAX_SIZE': 64 * 2 ** 20},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_totals VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE cache_totals
+    SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE cache_totals
+    SET entries = entries - 1, bytes = bytes - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache BEGIN
+    UPDATE cache_totals SET bytes = bytes + new.size - old.size;
+END;
+'''
+UPSERT = '''
+INSERT INTO cache (key, value, expires, accessed, size)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value,
+    expires = excluded.expires,
+    accessed = excluded.accessed,
+    size = excluded.size
+'''
+# Время чтения обновляется не чаще раза в секунду: LRU остается
+# приблизительным, зато частые чтения не превращаются в записи.
+ACCESS_RESOLUTION = 1.0
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        options = params.get('OPTIONS', {})
+        self.max_size = int(options.get('MAX_SIZE', 64 * 2 ** 20))
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        """Свое соединение у каждого потока и каждого процесса."""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self.location,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _read(self, key, now):
+        row = self.connection.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?', [key]
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            self.connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                [key, now]
+            )
+            return None
+        if now - accessed > ACCESS_RESOLUTION:
+            self.connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', [now, key]
+            )
+        return value
+
+    def _write(self, key, value, timeout, now):
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self.get_backend_timeout(timeout)
+        self.connection.execute(
+            UPSERT, [key, blob, expires, now, len(blob)]
+        )
+
+    def get(self, key, default=None, version=None):
+        blob = self._read(self._key(key, version), time.time())
+        return default if blob is None else pickle.loads(blob)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(self._key(key, version), value, timeout, time.time())
+        self._cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction():
+            if self._read(key, now) is not None:
+                return False
+            self._write(key, value, timeout, now)
+        self._cull()
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self.connection.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            [
+                self.get_backend_timeout(timeout),
+                self._key(key, version),
+                time.time(),
+            ]
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно и между процессами: чтение и запись в одной блокировке."""
+        key = self._key(key, version)
+        now = time.time()
+        with self._transaction():
+            blob = self._read(key, now)
+            if blob is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(blob) + delta
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            self.connection.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                [blob, len(blob), key]
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self.connection.execute(
+            'DELETE FROM cache WHERE key = ?', [self._key(key, version)]
+        )
+
+    def has_key(self, key, version=None):
+        return self._read(self._key(key, version), time.time()) is not None
+
+    def clear(self):
+        self.connection.execute('DELETE FROM cache')
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE: запись под блокировкой файла между процессами."""
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    def _cull(self):
+        entries, size = self.connection.execute(
+            'SELECT entries, bytes FROM cache_totals'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self.max_size:
+            return
+        with self._transaction():
+            self.connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', [time.time()]
+            )
+            # Освобождаем место с запасом в 1/CULL_FREQUENCY, чтобы не
+            # чистить кеш на каждой следующей записи.
+            keep = 1 - 1 / self._cull_frequency
+            while True:
+                entries, size = self.connection.execute(
+                    'SELECT entries, bytes FROM cache_totals'
+                ).fetchone()
+                if not entries or (entries <= self._max_entries * keep
+                                   and size <= self.max_size * keep):
+                    break
+                self.connection.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                    [max(entries // self._cull_frequency, 1)]
+                )
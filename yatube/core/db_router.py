@@ -0,0 +1,163 @@
+"""
+Чтение с реплик БД и запись в основную базу.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. На них уходят только
+чтения внутри view с декоратором read_from_replica; все записи и
+остальные чтения идут в default. Чтобы пользователь сразу видел свою
+запись, несмотря на отставание реплик, ReplicaPinMiddleware после
+любой записи ставит cookie, и REPLICA_PIN_SECONDS его запросы читают
+из default; в самом запросе чтения после записи тоже идут в default.
+
+То, что живет в кеше под версией содержимого (скелеты страниц, ответы
+с ETag), читается в контексте caught_up: реплика годится, только если
+уже получила все записи, отмеченные mark_write(), иначе — default.
+Номер последней записи хранится в кеше и в core.ReplicationMark, которая
+реплицируется вместе с данными.
+"""
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ReplicationMark
+
+PRIMARY = 'default'
+MARK_KEY = 'db_router:mark'
+CAUGHT_UP = 'caught_up'
+
+_local = threading.local()
+
+
+@contextmanager
+def _reading_from_replica(enabled):
+    previous = getattr(_local, 'replica', False)
+    _local.replica = enabled
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+def read_from_replica(view):
+    """Декоратор view: чтения в нем могут идти на реплику."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with _reading_from_replica(True):
+            return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def caught_up():
+    """
+    Контекст, в котором чтения идут на реплику, догнавшую все записи.
+
+    Работает только внутри read_from_replica. Номер нужной записи берется
+    при первом чтении, то есть после того, как прочитана версия
+    содержимого: реплика с этим номером уже содержит все, что в нее вошло.
+    """
+    enabled = getattr(_local, 'replica', False)
+    previous = getattr(_local, 'caught_up', None)
+    _local.caught_up = None
+    try:
+        with _reading_from_replica(CAUGHT_UP if enabled else False):
+            yield
+    finally:
+        _local.caught_up = previous
+
+
+def read_caught_up(view):
+    """Декоратор view: чтения в нем идут в контексте caught_up."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with caught_up():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def _current_mark():
+    """Номер последней записи; после вытеснения из кеша — из default."""
+    mark = cache.get(MARK_KEY)
+    if mark is None:
+        number = ReplicationMark.objects.using(PRIMARY).values_list(
+            'number', flat=True
+        ).first()
+        cache.add(MARK_KEY, number or 0, None)
+        mark = cache.get(MARK_KEY)
+    return mark
+
+
+def mark_write():
+    """
+    Отмечает уже сделанную запись в default: пока реплика не получит ее
+    номер, в контексте caught_up с нее не читают.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+    _current_mark()
+    number = cache.incr(MARK_KEY)
+    # Записи с большим номером могли обогнать эту, номер не уменьшаем.
+    ReplicationMark.objects.using(PRIMARY).filter(
+        number__lt=number
+    ).update(number=number)
+
+
+def _replica_mark(alias):
+    return ReplicationMark.objects.using(alias).values_list(
+        'number', flat=True
+    ).first()
+
+
+def _caught_up_replica(replicas):
+    alias = random.choice(replicas)
+    number = _replica_mark(alias)
+    if number is not None and number >= _current_mark():
+        return alias
+    return PRIMARY
+
+
+@contextmanager
+def request_state(pinned):
+    """Состояние запроса: закреплен ли он за default и были ли записи."""
+    _local.pinned = pinned
+    _local.wrote = False
+    try:
+        yield _local
+    finally:
+        _local.pinned = _local.wrote = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or not getattr(_local, 'replica', False)
+            or getattr(_local, 'pinned', False)
+            or getattr(_local, 'wrote', False)
+        ):
+            return PRIMARY
+        if _local.replica == CAUGHT_UP:
+            if _local.caught_up is None:
+                _local.caught_up = _caught_up_replica(replicas)
+            return _local.caught_up
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схема реплик копируется с основной базы, а не мигрируется."""
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,8 @@
+from django.template.loader import render_to_string
+
+from .page_cache import register_hole
+
+
+@register_hole
+def header(request):
+    return render_to_string('includes/header.html', request=request)
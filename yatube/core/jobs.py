@@ -0,0 +1,212 @@
+"""
+Очередь фоновых задач в основной базе данных.
+
+Задача — функция с декоратором @task; enqueue() пишет строку Job в той
+же транзакции, что и данные запроса, поэтому воркер увидит задачу
+только после коммита. Воркеры (manage.py runworker) забирают задачи
+условным UPDATE, так что одну задачу выполнит один воркер без
+SELECT ... FOR UPDATE. Неудачные попытки повторяются с
+экспоненциальной задержкой; задача может выполниться больше одного
+раза, поэтому задачи пишутся идемпотентными.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    IntegrityError, close_old_connections, connections, transaction
+)
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task(max_attempts=None):
+    """Объявляет функцию задачей очереди; аргументы — только JSON."""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        return func
+    return decorator
+
+
+def enqueue(func, *args, key=None, delay=0, requeue=False, **kwargs):
+    """
+    Ставит задачу в очередь и возвращает Job.
+
+    Если задача с таким key уже есть, новая не создается и
+    возвращается существующая. С requeue=True уже завершенная
+    (done или failed) задача с этим key ставится в очередь заново.
+    job.enqueued говорит, появилась ли в очереди новая работа.
+    """
+    job = Job(
+        name=func.task_name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        key=key,
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    job.enqueued = True
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        existing = Job.objects.get(key=key)
+        existing.enqueued = requeue and bool(
+            Job.objects.filter(
+                pk=existing.pk, status__in=(Job.DONE, Job.FAILED)
+            ).update(
+                status=Job.QUEUED,
+                payload=job.payload,
+                attempts=0,
+                run_at=job.run_at,
+                locked_by='',
+                locked_at=None,
+                last_error='',
+                finished=None,
+            )
+        )
+        if existing.enqueued:
+            existing.refresh_from_db()
+        return existing
+    return job
+
+
+def backoff(attempt):
+    """Задержка перед повтором в секундах: 2^n с разбросом ±20%."""
+    delay = min(
+        settings.JOBS_BACKOFF * 2 ** (attempt - 1), settings.JOBS_BACKOFF_MAX
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(worker):
+    """Забирает одну готовую к запуску задачу или возвращает None."""
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('run_at').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job):
+    """Выполняет взятую задачу и записывает результат; True при успехе."""
+    try:
+        func = import_string(job.name)
+        payload = json.loads(job.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s (%s) упала', job.pk, job.name)
+        now = timezone.now()
+        failed = job.attempts >= job.max_attempts
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED if failed else Job.QUEUED,
+            run_at=now if failed else now + timedelta(
+                seconds=backoff(job.attempts)
+            ),
+            finished=now if failed else None,
+            last_error=traceback.format_exc(),
+            locked_by='',
+            locked_at=None,
+        )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE,
+        finished=timezone.now(),
+        locked_by='',
+        locked_at=None,
+    )
+    return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров."""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_LOCK_TIMEOUT
+        ),
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished=timezone.now(), locked_by=''
+    )
+    return stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def purge_finished():
+    """Удаляет выполненные задачи старше JOBS_RETENTION."""
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_RETENTION
+        ),
+    ).delete()
+    return deleted
+
+
+def work(name, stop, poll_interval, once=False):
+    """Цикл воркера: выполняет задачи, пока не выставлен stop."""
+    while not stop.is_set():
+        job = claim(name)
+        if job is not None:
+            run(job)
+            continue
+        if once:
+            break
+        requeue_stale()
+        purge_finished()
+        close_old_connections()
+        stop.wait(poll_interval)
+
+
+def _work_in_thread(*args):
+    try:
+        work(*args)
+    finally:
+        connections.close_all()
+
+
+def run_threads(threads, poll_interval, once=False, stop=None):
+    """Запускает threads воркеров в текущем процессе и ждет их."""
+    stop = stop or threading.Event()
+    prefix = f'{socket.gethostname()}:{os.getpid()}'
+    workers = [
+        threading.Thread(
+            target=_work_in_thread,
+            args=(f'{prefix}:{index}', stop, poll_interval, once),
+            name=f'jobs-{index}',
+        )
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=1)
+    except KeyboardInterrupt:
+        stop.set()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,90 @@
+import json
+import os
+import random
+import tempfile
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.benchmark import run_concurrent
+from core.cache import SQLiteCache
+
+BACKENDS = {
+    'locmem': lambda directory, options: LocMemCache(
+        'bench', {'OPTIONS': options}
+    ),
+    'filebased': lambda directory, options: FileBasedCache(
+        os.path.join(directory, 'files'), {'OPTIONS': options}
+    ),
+    'sqlite': lambda directory, options: SQLiteCache(
+        os.path.join(directory, 'cache.sqlite3'), {'OPTIONS': options}
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержек get/set бэкендов кеша locmem, filebased и '
+        'core.cache.SQLiteCache. Печатает отчет в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument(
+            '--value-size', type=int, default=4096,
+            help='Размер значения в байтах (как фрагмент страницы).'
+        )
+        parser.add_argument('--operations', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--backends', nargs='+', choices=sorted(BACKENDS),
+            default=list(BACKENDS)
+        )
+        parser.add_argument('--output', help='Файл для отчета JSON.')
+
+    def handle(self, *args, **options):
+        value = 'x' * options['value_size']
+        cache_options = {'MAX_ENTRIES': options['keys'] * 2}
+        report = {
+            'keys': options['keys'],
+            'value_size': options['value_size'],
+            'concurrency': options['concurrency'],
+            'backends': {},
+        }
+        for name in options['backends']:
+            with tempfile.TemporaryDirectory() as directory:
+                cache = BACKENDS[name](directory, cache_options)
+                report['backends'][name] = self.run(cache, value, options)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def run(self, cache, value, options):
+        keys = [f'bench:{i}' for i in range(options['keys'])]
+
+        def make_worker(operation):
+            def worker():
+                rnd = random.Random()
+
+                def call():
+                    key = rnd.choice(keys)
+                    if operation == 'set':
+                        cache.set(key, value)
+                    else:
+                        cache.get(key)
+                    return True
+                return call
+            return worker
+
+        results = {}
+        for operation in ('set', 'get'):
+            results[operation] = run_concurrent(
+                make_worker(operation),
+                options['operations'],
+                options['concurrency'],
+                count_queries=False
+            )
+        return results
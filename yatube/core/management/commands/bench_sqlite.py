@@ -0,0 +1,175 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.benchmark import run_concurrent, summarize
+from core.sqlite import apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    pub_date REAL NOT NULL,
+    comments_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES post (id),
+    text TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX comment_post_created ON comment (post_id, created);
+'''
+FEED = '''
+SELECT id, text, comments_count FROM post ORDER BY pub_date DESC LIMIT 10
+'''
+# Настройки SQLite и Django по умолчанию: журнал отката и fsync на
+# каждой фиксации.
+DEFAULT_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер задержек чтения ленты, пока другие потоки пишут '
+        'комментарии: SQLite по умолчанию против SQLITE_PRAGMAS. '
+        'Печатает отчет в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--reads', type=int, default=5000)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--write-hold', type=float, default=0.005,
+            help='Секунд работы внутри транзакции записи (как счетчики '
+                 'и постановка задач в add_comment).'
+        )
+        parser.add_argument('--output', help='Файл для отчета JSON.')
+
+    def handle(self, *args, **options):
+        profiles = {
+            'default': DEFAULT_PRAGMAS,
+            'tuned': settings.SQLITE_PRAGMAS,
+        }
+        report = {
+            'posts': options['posts'],
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'write_hold_s': options['write_hold'],
+            'profiles': {},
+        }
+        for name, pragmas in profiles.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.seed(path, pragmas, options['posts'])
+                report['profiles'][name] = self.run(path, pragmas, options)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def connect(self, path, pragmas):
+        # Как в Django: таймаут 5 секунд, транзакции явными BEGIN.
+        connection = sqlite3.connect(
+            path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        apply_pragmas(connection.cursor(), pragmas)
+        return connection
+
+    def seed(self, path, pragmas, posts):
+        connection = self.connect(path, pragmas)
+        connection.executescript(SCHEMA)
+        now = time.time()
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+            ((f'Пост {i} ' * 20, now - i) for i in range(posts))
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def write(self, connection, rnd, options):
+        """Транзакция add_comment: комментарий и счетчик поста."""
+        post_id = rnd.randint(1, options['posts'])
+        connection.execute('BEGIN')
+        connection.execute(
+            'INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)',
+            [post_id, 'Комментарий', time.time()]
+        )
+        connection.execute(
+            'UPDATE post SET comments_count = comments_count + 1 '
+            'WHERE id = ?', [post_id]
+        )
+        time.sleep(options['write_hold'])
+        connection.execute('COMMIT')
+
+    def write_loop(self, path, pragmas, options, stop, results, lock):
+        """Поток-писатель: транзакции подряд, пока не выставлен stop."""
+        connection = self.connect(path, pragmas)
+        rnd = random.Random()
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                self.write(connection, rnd, options)
+            except sqlite3.OperationalError:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                with lock:
+                    results['errors'] += 1
+                continue
+            with lock:
+                results['commits'].append(time.perf_counter() - started)
+        connection.close()
+
+    def run(self, path, pragmas, options):
+        stop = threading.Event()
+        lock = threading.Lock()
+        results = {'commits': [], 'errors': 0}
+
+        def make_reader():
+            connection = self.connect(path, pragmas)
+
+            def read():
+                try:
+                    return len(connection.execute(FEED).fetchall()) == 10
+                except sqlite3.OperationalError:
+                    return False
+            return read
+
+        writers = [
+            threading.Thread(
+                target=self.write_loop,
+                args=(path, pragmas, options, stop, results, lock)
+            )
+            for _ in range(options['writers'])
+        ]
+        started = time.perf_counter()
+        for thread in writers:
+            thread.start()
+        try:
+            reads = run_concurrent(
+                make_reader, options['reads'], options['readers'],
+                count_queries=False
+            )
+        finally:
+            stop.set()
+            for thread in writers:
+                thread.join()
+        return {
+            'reads': reads,
+            'writes': summarize(
+                results['commits'],
+                time.perf_counter() - started,
+                errors=results['errors']
+            ),
+        }
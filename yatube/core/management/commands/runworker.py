@@ -0,0 +1,56 @@
+import multiprocessing
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+def _run_process(threads, poll_interval, once):
+    django.setup()
+    jobs.run_threads(threads, poll_interval, once)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи из очереди core.jobs в пуле процессов и потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOBS_PROCESSES
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOBS_THREADS,
+            help='Потоков в каждом процессе.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Секунд ожидания, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        arguments = (
+            options['threads'], options['poll_interval'], options['once']
+        )
+        if options['processes'] <= 1:
+            jobs.run_threads(*arguments)
+            return
+        context = multiprocessing.get_context('spawn')
+        processes = [
+            context.Process(target=_run_process, args=arguments)
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.join()
@@ -0,0 +1,52 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик: локальная замена '
+        'репликации для проверки core.db_router.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые N секунд (отставание '
+                 'реплик); 0 — скопировать один раз.'
+        )
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError(
+                'Реплики не настроены: задайте DATABASE_REPLICAS.'
+            )
+        aliases = ['default', *replicas]
+        if any(settings.DATABASES[alias]['ENGINE'] != SQLITE
+               for alias in aliases):
+            raise CommandError(
+                'Копируются только SQLite-базы; настоящие реплики '
+                'обновляет сервер БД.'
+            )
+        while True:
+            for alias in replicas:
+                self.copy(
+                    settings.DATABASES['default']['NAME'],
+                    settings.DATABASES[alias]['NAME']
+                )
+                self.stdout.write(f'{alias}: скопировано')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source, target):
+        """Онлайн-копия через backup API: читатели реплики не мешают."""
+        with closing(sqlite3.connect(source)) as primary:
+            with closing(sqlite3.connect(target)) as replica:
+                primary.backup(replica)
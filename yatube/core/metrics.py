@@ -0,0 +1,332 @@
+"""
+Метрики запросов по именам view, общие для всех процессов-воркеров.
+
+Гистограммы и счетчики лежат в файле, отображенном в память (mmap):
+у каждого view свой слот фиксированного размера, запись идет под
+файловой блокировкой, поэтому все воркеры gunicorn пишут в одни и те же
+числа, а /metrics/ отдает их в текстовом формате Prometheus.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache.backends.locmem import (
+    LocMemCache as BaseLocMemCache,
+)
+from django.db import connections
+from django.template.backends.django import (
+    DjangoTemplates as BaseDjangoTemplates, Template,
+)
+
+from .cache import SQLiteCache as BaseSQLiteCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: только блокировка внутри процесса.
+    fcntl = None
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAMS = (
+    ('request_duration_seconds', 'Время обработки запроса'),
+    ('db_duration_seconds', 'Время запросов к БД за запрос'),
+    ('template_render_seconds', 'Время рендеринга шаблонов за запрос'),
+)
+# (метрика, описание, атрибут RequestMetrics)
+COUNTERS = (
+    ('db_queries_total', 'Число запросов к БД', 'db_queries'),
+    ('cache_hits_total', 'Попадания в кеш', 'cache_hits'),
+    ('cache_misses_total', 'Промахи кеша', 'cache_misses'),
+    ('cache_recomputes_total', 'Пересчеты значений кеша', 'recomputes'),
+    (
+        'cache_recomputes_prevented_total',
+        'Пересчеты, которых избежали благодаря coalescing',
+        'recomputes_prevented',
+    ),
+)
+NAME_SIZE = 64
+MAGIC = b'YTMETRIC'
+HEADER = struct.Struct('<8sII')
+SLOT = struct.Struct(
+    f'<{NAME_SIZE}s'
+    + f'{len(BUCKETS) + 1}Qd' * len(HISTOGRAMS)
+    + f'{len(COUNTERS)}Q'
+)
+HIST_SIZE = len(BUCKETS) + 2
+MISSING = object()
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Замеры одного запроса, которые копятся во время его обработки."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.recomputes = 0
+        self.recomputes_prevented = 0
+        self.render_depth = 0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+class MetricsStore:
+    """Таблица слотов в mmap-файле; открывается заново после fork."""
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self.size = HEADER.size + slots * SLOT.size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        if self._pid == os.getpid():
+            return
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._file_lock():
+            if os.fstat(self._fd).st_size != self.size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self.size)
+            self._map = mmap.mmap(self._fd, self.size)
+            magic, version, slots = HEADER.unpack_from(self._map)
+            if (magic, version, slots) != (MAGIC, SLOT.size, self.slots):
+                self._map[:] = bytes(self.size)
+                HEADER.pack_into(self._map, 0, MAGIC, SLOT.size, self.slots)
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offset(self, index):
+        return HEADER.size + index * SLOT.size
+
+    def _find_slot(self, name):
+        """Индекс слота view: открытая адресация по crc32 имени."""
+        encoded = name.encode()[:NAME_SIZE].ljust(NAME_SIZE, b'\0')
+        start = zlib.crc32(encoded) % self.slots
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            stored = self._map[
+                self._offset(index):self._offset(index) + NAME_SIZE
+            ]
+            if stored == encoded:
+                return index, False
+            if not stored.strip(b'\0'):
+                return index, True
+        return None, False
+
+    def record(self, name, duration, request_metrics):
+        with self._lock:
+            self._open()
+            with self._file_lock():
+                index, new = self._find_slot(name)
+                if index is None:
+                    return
+                offset = self._offset(index)
+                values = list(SLOT.unpack_from(self._map, offset))
+                if new:
+                    values = [name.encode()[:NAME_SIZE]] + [0] * (
+                        len(values) - 1
+                    )
+                observed = (
+                    duration,
+                    request_metrics.db_time,
+                    request_metrics.render_time,
+                )
+                for position, value in enumerate(observed):
+                    base = 1 + position * HIST_SIZE
+                    bucket = next(
+                        (i for i, le in enumerate(BUCKETS) if value <= le),
+                        len(BUCKETS)
+                    )
+                    values[base + bucket] += 1
+                    values[base + len(BUCKETS) + 1] += value
+                counters = [
+                    getattr(request_metrics, attribute)
+                    for _, _, attribute in COUNTERS
+                ]
+                base = 1 + len(HISTOGRAMS) * HIST_SIZE
+                for position, value in enumerate(counters):
+                    values[base + position] += value
+                SLOT.pack_into(self._map, offset, *values)
+
+    def snapshot(self):
+        """Словарь «view: значения слота» для всех занятых слотов."""
+        with self._lock:
+            self._open()
+            with self._file_lock():
+                rows = [
+                    SLOT.unpack_from(self._map, self._offset(index))
+                    for index in range(self.slots)
+                ]
+        return {
+            row[0].rstrip(b'\0').decode(errors='replace'): row[1:]
+            for row in rows if row[0].strip(b'\0')
+        }
+
+
+_store = None
+
+
+def store():
+    global _store
+    path = settings.METRICS_FILE
+    if _store is None or _store.path != path:
+        _store = MetricsStore(path, settings.METRICS_SLOTS)
+    return _store
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_text():
+    """Все метрики в текстовом формате Prometheus."""
+    snapshot = store().snapshot()
+    lines = []
+    for position, (metric, description) in enumerate(HISTOGRAMS):
+        name = f'yatube_{metric}'
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for view, values in sorted(snapshot.items()):
+            label = f'view="{_escape(view)}"'
+            base = position * HIST_SIZE
+            cumulative = 0
+            for i, le in enumerate(BUCKETS + ('+Inf',)):
+                cumulative += values[base + i]
+                lines.append(
+                    f'{name}_bucket{{{label},le="{le}"}} {cumulative}'
+                )
+            total = values[base + HIST_SIZE - 1]
+            lines.append(f'{name}_sum{{{label}}} {total}')
+            lines.append(f'{name}_count{{{label}}} {cumulative}')
+    for position, (metric, description, _) in enumerate(COUNTERS):
+        name = f'yatube_{metric}'
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        for view, values in sorted(snapshot.items()):
+            value = values[len(HISTOGRAMS) * HIST_SIZE + position]
+            lines.append(f'{name}{{view="{_escape(view)}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class TimedTemplate(Template):
+    """Шаблон, время рендеринга которого идет в метрики запроса."""
+
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return super().render(context, request)
+        metrics.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.render_depth -= 1
+            # Вложенные render() (render_to_string внутри тегов)
+            # уже учтены во внешнем.
+            if not metrics.render_depth:
+                metrics.render_time += time.perf_counter() - started
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """
+    Бэкенд шаблонов Django с замером рендеринга.
+
+    Подключается в settings.TEMPLATES, поэтому замеряются только шаблоны
+    этого движка, а сам django.template не меняется.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class InstrumentedCacheMixin:
+    """
+    Считает попадания и промахи кеша в метриках запроса.
+
+    Подмешивается к бэкендам ниже, которые выбираются в settings.CACHES:
+    сами классы Django и другие экземпляры кеша не меняются.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version=version)
+        metrics = current()
+        if metrics is not None:
+            if value is MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        metrics = current()
+        # BaseCache.get_many сам вызывает get: ключ считается один раз,
+        # здесь, а не в каждом get.
+        _local.metrics = None
+        try:
+            found = super().get_many(keys, version=version)
+        finally:
+            _local.metrics = metrics
+        if metrics is not None:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+
+class LocMemCache(InstrumentedCacheMixin, BaseLocMemCache):
+    """LocMemCache с замером обращений."""
+
+
+class SQLiteCache(InstrumentedCacheMixin, BaseSQLiteCache):
+    """core.cache.SQLiteCache с замером обращений."""
+
+
+class collect:
+    """Контекст замеров запроса: включает сбор и обертки запросов к БД."""
+
+    def __enter__(self):
+        self.metrics = RequestMetrics()
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(
+                connection.execute_wrapper(self.metrics.db_wrapper)
+            )
+        _local.metrics = self.metrics
+        return self.metrics
+
+    def __exit__(self, *exc):
+        _local.metrics = None
+        self.stack.close()
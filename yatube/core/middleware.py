@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+
+from . import db_router, metrics
+
+
+class MetricsMiddleware:
+    """
+    Замеряет каждый запрос и копит результат по имени view.
+
+    Стоит первым в MIDDLEWARE, чтобы время учитывало весь стек.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with metrics.collect() as collected:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else '<unresolved>'
+        metrics.store().record(view_name, duration, collected)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет чтения пользователя за основной базой после его записи.
+
+    Стоит до SessionMiddleware, чтобы запись сессии тоже учитывалась.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = settings.REPLICA_PIN_COOKIE in request.COOKIES
+        with db_router.request_state(pinned) as state:
+            response = self.get_response(request)
+            wrote = state.wrote
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+def create_mark(apps, schema_editor):
+    ReplicationMark = apps.get_model('core', 'ReplicationMark')
+    ReplicationMark.objects.create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationMark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.BigIntegerField(default=0, verbose_name='Номер записи')),
+            ],
+            options={
+                'verbose_name': 'Метка репликации',
+                'verbose_name_plural': 'Метки репликации',
+            },
+        ),
+        migrations.RunPython(create_mark, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача очереди core.jobs."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы в JSON', default='{}')
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    locked_by = models.CharField('Воркер', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
+
+    class Meta:
+        ordering = ['run_at']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Очередь задач'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='job_status_run_at_idx'
+            ),
+        ]
+
+
+class ReplicationMark(models.Model):
+    """
+    Номер последней записи в default (core.db_router.mark_write).
+
+    Единственная строка копируется на реплики вместе с данными, поэтому по
+    ней видно, догнала ли реплика основную базу.
+    """
+    number = models.BigIntegerField('Номер записи', default=0)
+
+    def __str__(self):
+        return str(self.number)
+
+    class Meta:
+        verbose_name = 'Метка репликации'
+        verbose_name_plural = 'Метки репликации'
@@ -0,0 +1,153 @@
+"""
+Кеш целых страниц с «дырками» под персональные фрагменты.
+
+Страница рендерится один раз в «скелет», где на месте фрагментов,
+зависящих от пользователя (шапка, кнопка подписки, форма комментария),
+стоят метки. Для анонимов скелет с заполненными метками кешируется
+целиком и отдается без рендеринга; для вошедших пользователей
+заполняются только метки, а общий скелет берется из кеша.
+
+Ключи содержат версию содержимого, поэтому при изменении данных
+страницы не удаляются, а просто перестают читаться.
+"""
+import base64
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.safestring import mark_safe
+
+from .db_router import caught_up
+from .stampede import get_or_compute
+
+HOLE_RE = re.compile(r'<!--page-hole:(\w+):([\w=-]*)-->')
+_holes = {}
+
+
+def register_hole(func):
+    """Регистрирует функцию фрагмента: (request, **kwargs) -> HTML."""
+    _holes[func.__name__] = func
+    return func
+
+
+def render_hole(request, name, **kwargs):
+    """HTML фрагмента или метка, если сейчас рендерится скелет."""
+    if getattr(request, '_page_skeleton', False):
+        payload = base64.urlsafe_b64encode(
+            json.dumps(kwargs, separators=(',', ':')).encode()
+        ).decode()
+        return mark_safe(f'<!--page-hole:{name}:{payload}-->')
+    return mark_safe(_holes[name](request, **kwargs))
+
+
+def fill_holes(request, skeleton):
+    """Подставляет в скелет фрагменты для текущего пользователя."""
+    def fill(match):
+        kwargs = json.loads(base64.urlsafe_b64decode(match.group(2)))
+        return _holes[match.group(1)](request, **kwargs)
+    return HOLE_RE.sub(fill, skeleton)
+
+
+def _page_key(request, version, kind):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'page:{kind}:{version}:{url}'
+
+
+class Uncacheable(Exception):
+    """Ответ view нельзя класть в кеш (не 200 или потоковый)."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def _render_skeleton(view, request, *args, **kwargs):
+    """
+    Рендерит view с метками вместо фрагментов: (ответ, тело, тип).
+
+    Скелет живет в кеше часами, поэтому реплика годится для него, только
+    если догнала основную базу (db_router.caught_up): отстающая не должна
+    попасть в кеш под новой версией.
+    """
+    request._page_skeleton = True
+    try:
+        with caught_up():
+            response = view(request, *args, **kwargs)
+    finally:
+        request._page_skeleton = False
+    if response.streaming:
+        raise Uncacheable(response)
+    if response.status_code != 200:
+        response.content = fill_holes(
+            request, response.content.decode(response.charset)
+        )
+        raise Uncacheable(response)
+    return (
+        response,
+        response.content.decode(response.charset),
+        response['Content-Type']
+    )
+
+
+def _skeleton(view, request, version, *args, **kwargs):
+    """(ответ, скелет); при промахе скелет рендерит один запрос из многих."""
+    rendered = []
+
+    def render():
+        response, *skeleton = _render_skeleton(
+            view, request, *args, **kwargs
+        )
+        rendered.append(response)
+        return skeleton
+
+    skeleton = get_or_compute(
+        _page_key(request, version, 'skeleton'),
+        render,
+        settings.PAGE_CACHE_TIMEOUT
+    )
+    if rendered:
+        return rendered[0], skeleton
+    return HttpResponse(content_type=skeleton[1]), skeleton
+
+
+def cached_page(get_version):
+    """
+    Декоратор view: кеширует GET-ответ, ключ — адрес и версия
+    get_version(*args, **kwargs) от аргументов view.
+
+    Кешируются только ответы 200; остальные отдаются как есть. Скелет
+    после смены версии рендерит один запрос (core.stampede), остальные
+    ждут его.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            version = get_version(*args, **kwargs)
+            anonymous = not request.user.is_authenticated
+            anonymous_key = _page_key(request, version, 'anonymous')
+            if anonymous:
+                cached = cache.get(anonymous_key)
+                if cached is not None:
+                    return HttpResponse(cached[0], content_type=cached[1])
+            try:
+                response, cached = _skeleton(
+                    view, request, version, *args, **kwargs
+                )
+            except Uncacheable as error:
+                return error.response
+            response.content = fill_holes(request, cached[0])
+            if anonymous:
+                cache.set(
+                    anonymous_key,
+                    (response.content, cached[1]),
+                    settings.PAGE_CACHE_TIMEOUT
+                )
+            return response
+        return wrapper
+    return decorator
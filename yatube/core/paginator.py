@@ -0,0 +1,159 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+class KeysetPaginator(Paginator):
+    """
+    Паджинатор по ключу (keyset/cursor pagination).
+
+    Следующая страница выбирается условием «после ключа последней записи»
+    по индексу, поэтому страница N стоит столько же, сколько первая:
+    нет ни COUNT(*), ни OFFSET. Ключи перечисляются как в order_by(),
+    последний из них должен быть уникальным (обычно pk).
+    Переходы между страницами передаются непрозрачными токенами.
+    """
+
+    def __init__(self, object_list, per_page, keys=('-pub_date', '-pk')):
+        super().__init__(object_list, per_page)
+        self.keys = keys
+        self._num_pages = 1
+
+    def _check_object_list_is_ordered(self):
+        """Порядок задают ключи паджинации, исходный порядок не важен."""
+
+    @property
+    def num_pages(self):
+        """Число уже известных страниц: текущая и, если есть, следующая."""
+        return self._num_pages
+
+    def get_page(self, number=None, cursor=None):
+        """
+        Возвращает страницу по токену, а без него — по номеру.
+
+        Номер страницы поддерживается для старых ссылок вида ?page=N,
+        неверные токены и номера ведут на первую страницу.
+        """
+        if cursor:
+            decoded = self.decode_cursor(cursor)
+            if decoded is not None:
+                return self.page_after(*decoded)
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        return self.page(number)
+
+    def page(self, number):
+        """
+        Страница по номеру: OFFSET без подсчёта общего числа записей.
+
+        Номер за концом списка, как и в Paginator.get_page, заменяется
+        последней страницей; COUNT(*) нужен только в этом случае.
+        """
+        offset = (number - 1) * self.per_page
+        rows = list(self._ordered()[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            return self.page(self._last_page())
+        return self._build_page(
+            rows[:self.per_page],
+            number,
+            has_previous=number > 1,
+            has_next=len(rows) > self.per_page,
+        )
+
+    def page_after(self, values, number, backward=False):
+        """Страница строго после (или перед) записи с ключом values."""
+        rows = list(self._seek(values, backward)[:self.per_page + 1])
+        if not backward:
+            return self._build_page(
+                rows[:self.per_page],
+                number,
+                has_previous=True,
+                has_next=len(rows) > self.per_page,
+            )
+        if len(rows) <= self.per_page:
+            return self.page(1)
+        rows = rows[:self.per_page]
+        rows.reverse()
+        # Шли назад от первой записи более поздней страницы,
+        # значит следующая страница заведомо существует.
+        return self._build_page(
+            rows, max(number, 2), has_previous=True, has_next=True
+        )
+
+    def encode_cursor(self, obj, number, backward=False):
+        values = [
+            self._key_field(key).value_to_string(obj) for key in self.keys
+        ]
+        payload = json.dumps(
+            [values, number, int(backward)], separators=(',', ':')
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        padding = '=' * (-len(cursor) % 4)
+        try:
+            payload = base64.urlsafe_b64decode(cursor + padding)
+            values, number, backward = json.loads(payload.decode())
+            values = [
+                self._key_field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (
+            binascii.Error, UnicodeDecodeError, ValueError, TypeError,
+            ValidationError,
+        ):
+            return None
+        if len(values) != len(self.keys) or type(number) is not int:
+            return None
+        return values, max(number, 1), bool(backward)
+
+    def _last_page(self):
+        count = self._ordered().count()
+        return max((count + self.per_page - 1) // self.per_page, 1)
+
+    def _build_page(self, rows, number, has_previous, has_next):
+        has_next = has_next and bool(rows)
+        self._num_pages = number + 1 if has_next else number
+        page = Page(rows, number, self)
+        page.next_cursor = page.previous_cursor = None
+        if has_next:
+            page.next_cursor = self.encode_cursor(rows[-1], number + 1)
+        if has_previous and rows and number > 1:
+            page.previous_cursor = self.encode_cursor(
+                rows[0], number - 1, backward=True
+            )
+        return page
+
+    def _ordered(self, backward=False):
+        if not backward:
+            return self.object_list.order_by(*self.keys)
+        return self.object_list.order_by(
+            *[self._flip(key) for key in self.keys]
+        )
+
+    def _seek(self, values, backward=False):
+        """Условие «строго после ключа» в порядке self.keys."""
+        condition = Q()
+        equal = Q()
+        for key, value in zip(self.keys, values):
+            name = key.lstrip('-')
+            descending = key.startswith('-') != backward
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return self._ordered(backward).filter(condition)
+
+    def _key_field(self, key):
+        opts = self.object_list.model._meta
+        name = key.lstrip('-')
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    @staticmethod
+    def _flip(key):
+        return key[1:] if key.startswith('-') else f'-{key}'
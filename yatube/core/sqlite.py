@@ -0,0 +1,25 @@
+"""
+Настройка каждого нового соединения с SQLite: PRAGMA из SQLITE_PRAGMAS.
+
+В режиме WAL запись идет в отдельный журнал, а читатели видят последний
+зафиксированный снимок, поэтому add_comment больше не блокирует ленты
+на время своей транзакции. synchronous=NORMAL делает fsync только при
+checkpoint, mmap_size и cache_size держат горячие страницы в памяти,
+busy_timeout заставляет второго писателя подождать, а не падать с
+«database is locked».
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
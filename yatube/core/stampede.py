@@ -0,0 +1,97 @@
+"""
+Защита кеша от одновременного пересчета одного значения (cache stampede).
+
+get_or_compute() хранит рядом со значением срок его годности и время,
+которое ушло на вычисление. Значение пересчитывается чуть раньше срока
+с вероятностью, растущей к его концу (probabilistic early expiration,
+XFetch), — так пересчет достается одному запросу, а не всем сразу.
+Пересчитывает только тот, кто взял блокировку в кеше (cache.add),
+остальные в это время получают старое значение или ждут нового. Старое
+значение хранится в кеше вдвое дольше срока годности.
+"""
+import math
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+from . import metrics
+
+# Как часто ожидающий запрос проверяет, не появилось ли значение.
+POLL_INTERVAL = 0.05
+
+stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    """Счетчик процесса и метрика текущего запроса, если она собирается."""
+    with _stats_lock:
+        stats[name] += 1
+    request_metrics = metrics.current()
+    if request_metrics is not None:
+        setattr(
+            request_metrics, name, getattr(request_metrics, name) + 1
+        )
+
+
+def _is_fresh(entry, now):
+    """XFetch: чем дороже пересчет и ближе срок, тем раньше он начнется."""
+    _, delta, expires = entry
+    if expires is None:
+        return True
+    jitter = -math.log(1 - random.random())
+    return now + delta * settings.STAMPEDE_BETA * jitter < expires
+
+
+def _wait(cache, key):
+    """Ждет, пока значение посчитает другой запрос; None по таймауту."""
+    deadline = time.monotonic() + settings.STAMPEDE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_compute(key, compute, timeout, cache=None):
+    """
+    Значение из кеша или compute(), посчитанное одним запросом из многих.
+
+    timeout — срок годности в секундах, None — бессрочно, как в cache.set.
+    """
+    cache = cache or default_cache
+    if timeout is not None and timeout <= 0:
+        return compute()
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, time.time()):
+        return entry[0]
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is None:
+            entry = _wait(cache, key)
+        if entry is not None:
+            _count('recomputes_prevented')
+            return entry[0]
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        if timeout is None:
+            cache.set(key, (value, finished - started, None), None)
+        else:
+            cache.set(
+                key,
+                (value, finished - started, finished + timeout),
+                timeout * 2
+            )
+        _count('recomputes')
+        return value
+    finally:
+        if locked:
+            cache.delete(lock_key)
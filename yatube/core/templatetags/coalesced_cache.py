@@ -0,0 +1,78 @@
+"""
+Тег {% cache %} с защитой от одновременного пересчета фрагмента.
+
+Синтаксис и ключи те же, что у встроенного тега, поэтому достаточно
+заменить {% load cache %} на {% load coalesced_cache %}; пересчет идет
+через core.stampede.get_or_compute.
+"""
+from django import template
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template import TemplateSyntaxError, VariableDoesNotExist
+from django.templatetags.cache import CacheNode, do_cache
+
+from core.stampede import get_or_compute
+
+register = template.Library()
+
+
+class CoalescedCacheNode(CacheNode):
+    def resolve_timeout(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if expire_time is None:
+            return None
+        try:
+            return int(expire_time)
+        except (ValueError, TypeError):
+            raise TemplateSyntaxError(
+                f'"cache" tag got a non-integer timeout value: '
+                f'{expire_time!r}'
+            )
+
+    def resolve_cache(self, context):
+        if not self.cache_name:
+            try:
+                return caches['template_fragments']
+            except InvalidCacheBackendError:
+                return caches['default']
+        try:
+            cache_name = self.cache_name.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError(
+                f'"cache" tag got an unknown variable: '
+                f'{self.cache_name.var!r}'
+            )
+        try:
+            return caches[cache_name]
+        except InvalidCacheBackendError:
+            raise TemplateSyntaxError(
+                f'Invalid cache name specified for cache tag: '
+                f'{cache_name!r}'
+            )
+
+    def render(self, context):
+        timeout = self.resolve_timeout(context)
+        fragment_cache = self.resolve_cache(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return get_or_compute(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            timeout,
+            cache=fragment_cache
+        )
+
+
+@register.tag('cache')
+def do_coalesced_cache(parser, token):
+    """{% cache timeout name [vary_on ...] [using="cache"] %}."""
+    node = do_cache(parser, token)
+    return CoalescedCacheNode(
+        node.nodelist, node.expire_time_var, node.fragment_name,
+        node.vary_on, node.cache_name
+    )
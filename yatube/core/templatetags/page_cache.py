@@ -0,0 +1,11 @@
+from django import template
+
+from core.page_cache import render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_hole(context, name, **kwargs):
+    """Персональный фрагмент страницы, см. core.page_cache."""
+    return render_hole(context['request'], name, **kwargs)
@@ -1,5 +1,12 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +22,20 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_view(request):
+    """
+    Метрики запросов для Prometheus; только с токеном METRICS_TOKEN.
+
+    Токен передается заголовком «Authorization: Bearer <токен>». Проверка
+    по адресу клиента не годится: за прокси все запросы идут с 127.0.0.1.
+    Без METRICS_TOKEN метрики закрыты.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(header, f'Bearer {token}'):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render_text(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Group, Post
 
 
@@ -13,9 +14,18 @@ class PostAdmin(admin.ModelAdmin):
     )
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_deleted')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE '%term%'."""
+        if not search_term or not search.available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        found = search.matching(search_term).values('post')
+        return queryset.filter(pk__in=found), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = (
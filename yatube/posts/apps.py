@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     name = 'posts'
     verbose_name = 'Посты и группы'
+
+    def ready(self):
+        from . import holes, signals  # noqa: F401
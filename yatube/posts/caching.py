@@ -0,0 +1,191 @@
+"""
+Версии содержимого для ключей кеша и условного GET.
+
+Версии входят в ключи закешированных фрагментов и страниц и
+увеличиваются сигналами при изменении данных, поэтому старые фрагменты
+просто перестают читаться и время жизни кеша можно держать большим. Из
+них же строятся ETag страниц. Last-Modified не отдается: у него шаг в
+секунду, и два изменения за одну секунду дали бы ложный 304.
+
+Версии разделены по областям: index (все посты), post:<id>,
+author:<id> и group:<id>. Новый пост меняет index, свою группу, автора
+и сам пост, комментарий — только свой пост и comments. Переименование
+группы или пользователя видно на многих страницах, поэтому меняет общую
+эпоху (epoch), которая входит в каждую версию.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.views.decorators.http import condition
+
+from core.db_router import PRIMARY, mark_write, read_caught_up
+from .models import Group, Post
+
+User = get_user_model()
+
+VERSION_KEY = 'posts:version:{}'
+USER_MODIFIED_KEY = 'posts:user_modified:{}'
+SCOPE_ID_KEY = 'posts:scope_id:{}:{}:{}'
+EPOCH = 'epoch'
+
+
+def _versions(scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Начальное значение берём из времени в наносекундах: если
+            # ключ вытеснят или кеш очистят, новое начало больше любой
+            # выданной версии — за наносекунду её не увеличить на 1.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_feed_version(*scopes):
+    """
+    Версия областей scopes (по умолчанию index) вместе с эпохой.
+
+    Строка вида «эпоха.версия...», пригодная для ключей кеша.
+    """
+    versions = _versions([EPOCH, *(scopes or ['index'])])
+    return '.'.join(map(str, versions))
+
+
+def bump_feed_version(*scopes):
+    """Меняет версии областей; без аргументов — эпоху, то есть все."""
+    mark_write()
+    for scope in set(scopes or [EPOCH]):
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_on_commit(*scopes):
+    """
+    bump_feed_version после коммита текущей транзакции.
+
+    До коммита другие запросы еще видят старые строки: с новой версией
+    они положили бы в кеш старую страницу под новым ключом.
+    """
+    transaction.on_commit(lambda: bump_feed_version(*scopes))
+
+
+def _first(queryset, field):
+    return queryset.values_list(field, flat=True).first()
+
+
+def _scope_id(kind, value, queryset, field):
+    """
+    id области по slug или имени из URL, без запроса к БД при попадании.
+
+    Ключ содержит эпоху: slug и имена меняются только вместе с ней.
+    Отсутствующий объект не запоминается, его могут создать позже, и
+    дает 404 раньше ETag: иначе на его адрес отвечали бы 304. Промах на
+    реплике проверяется в основной базе: реплика могла еще не получить
+    только что созданный объект.
+    """
+    key = SCOPE_ID_KEY.format(kind, _versions([EPOCH])[0], value)
+    found = cache.get(key)
+    if found is None:
+        found = _first(queryset, field)
+        if found is None and settings.DATABASE_REPLICAS:
+            found = _first(queryset.using(PRIMARY), field)
+        if found is None:
+            raise Http404
+        cache.set(key, found, None)
+    return found
+
+
+def index_version(*args, **kwargs):
+    return get_feed_version('index')
+
+
+def group_version(slug):
+    group_id = _scope_id(
+        'group', slug, Group.objects.filter(slug=slug), 'pk'
+    )
+    return get_feed_version(f'group:{group_id}')
+
+
+def author_version(username):
+    author_id = _scope_id(
+        'author', username, User.objects.filter(username=username), 'pk'
+    )
+    return get_feed_version(f'author:{author_id}')
+
+
+def post_version(post_id):
+    """Версия страницы поста: сам пост и счетчики его автора."""
+    author_id = _scope_id(
+        'post', post_id, Post.objects.filter(pk=post_id), 'author_id'
+    )
+    return get_feed_version(f'post:{post_id}', f'author:{author_id}')
+
+
+def get_user_modified(user_id):
+    """Время последнего изменения персональных фрагментов пользователя."""
+    key = USER_MODIFIED_KEY.format(user_id)
+    cache.add(key, time.time(), None)
+    return cache.get(key)
+
+
+def touch_user(user_id):
+    cache.set(USER_MODIFIED_KEY.format(user_id), time.time(), None)
+
+
+def page_etag(get_version):
+    """
+    ETag страницы без рендеринга: версия содержимого и, для вошедших,
+    пользователь, его фрагменты и CSRF-токен в форме комментария.
+    """
+    def etag(request, *args, **kwargs):
+        parts = [get_version(*args, **kwargs)]
+        user = request.user
+        if user.is_authenticated:
+            parts += [
+                user.pk,
+                get_user_modified(user.pk),
+                request.META.get('CSRF_COOKIE', ''),
+            ]
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+    return etag
+
+
+def conditional_page(get_version):
+    """
+    Условный GET: 304 без обращения к view, если страница не менялась.
+
+    Сам view читает реплику, только если она догнала версию из ETag
+    (db_router.caught_up): иначе клиент запомнил бы старый ответ под
+    новым ETag и получал бы на него 304.
+    """
+    def decorator(view):
+        return condition(etag_func=page_etag(get_version))(
+            read_caught_up(view)
+        )
+    return decorator
+
+
+def feed_etag(get_version):
+    """ETag RSS/Atom: ленты одни для всех, важна только версия."""
+    def etag(request, *args, **kwargs):
+        return hashlib.md5(
+            repr(get_version(*args, **kwargs)).encode()
+        ).hexdigest()
+    return etag
+
+
+def conditional_feed(get_version):
+    def decorator(view):
+        return condition(etag_func=feed_etag(get_version))(
+            read_caught_up(view)
+        )
+    return decorator
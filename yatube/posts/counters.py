@@ -0,0 +1,117 @@
+"""
+Денормализованные счетчики постов, комментариев и подписок.
+
+Счетчики меняются в той же транзакции, что и сами записи, во вьюхах
+post_create, post_edit, post_del, add_comment и (un)follow. Записи,
+созданные в обход вьюх (админка, shell), счетчики не меняют — такой
+дрейф исправляет команда reconcile_counters.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+def _add(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def _add_user(user_id, **deltas):
+    if not _add(UserStats.objects.filter(user_id=user_id), **deltas):
+        # Строки нет (пользователь создан в обход сигнала) — считаем
+        # счетчики с нуля, текущее изменение уже в базе.
+        reconcile(users=[user_id])
+
+
+def post_added(post):
+    _add_user(post.author_id, posts_count=1)
+    if post.group_id:
+        _add(Group.objects.filter(pk=post.group_id), posts_count=1)
+
+
+def post_removed(post):
+    _add_user(post.author_id, posts_count=-1)
+    if post.group_id:
+        _add(Group.objects.filter(pk=post.group_id), posts_count=-1)
+
+
+def post_moved(post, old_group_id):
+    if old_group_id == post.group_id:
+        return
+    if old_group_id:
+        _add(Group.objects.filter(pk=old_group_id), posts_count=-1)
+    if post.group_id:
+        _add(Group.objects.filter(pk=post.group_id), posts_count=1)
+
+
+def comment_added(comment):
+    _add(Post.objects.filter(pk=comment.post_id), comments_count=1)
+
+
+def follow_added(user, author):
+    _add_user(user.pk, following_count=1)
+    _add_user(author.pk, followers_count=1)
+
+
+def follow_removed(user, author):
+    _add_user(user.pk, following_count=-1)
+    _add_user(author.pk, followers_count=-1)
+
+
+def _count(model, field, **filters):
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}, **filters
+    ).order_by()
+    return Coalesce(
+        Subquery(
+            rows.values(field).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def reconcile(users=None):
+    """
+    Пересчитывает все счетчики по фактическим данным.
+
+    Возвращает словарь «счетчик: число исправленных строк».
+    """
+    missing = User.objects.filter(stats__isnull=True)
+    stats = UserStats.objects.all()
+    if users is not None:
+        missing = missing.filter(pk__in=users)
+        stats = stats.filter(pk__in=users)
+    UserStats.objects.bulk_create(
+        [
+            UserStats(user_id=pk)
+            for pk in missing.values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True
+    )
+    counters = (
+        ('stats.posts_count', stats,
+         _count(Post, 'author', is_deleted=False)),
+        ('stats.followers_count', stats, _count(Follow, 'author')),
+        ('stats.following_count', stats, _count(Follow, 'user')),
+    )
+    if users is None:
+        counters += (
+            ('group.posts_count', Group.objects.all(),
+             _count(Post, 'group', is_deleted=False)),
+            ('post.comments_count', Post.objects.all(),
+             _count(Comment, 'post')),
+        )
+    drift = {}
+    for name, queryset, actual in counters:
+        field = name.split('.')[1]
+        drifted = queryset.annotate(actual=actual).exclude(
+            **{field: F('actual')}
+        )
+        drift[name] = drifted.update(**{field: actual})
+    return drift
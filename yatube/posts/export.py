@@ -0,0 +1,88 @@
+"""
+Выгрузка всей истории автора: посты, комментарии и адреса картинок.
+
+Строки читаются из БД кусками через iterator() в порядке (дата, id) и
+сразу превращаются в текст, поэтому память не растет с числом строк,
+а первый кусок уходит клиенту до чтения остальных. Форматы: NDJSON
+(объект JSON на строку) и CSV с общими колонками для постов и
+комментариев.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+
+from .models import Comment, Post
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+CSV_FIELDS = ('type', 'id', 'date', 'post_id', 'group', 'image', 'text')
+
+
+def rows(author):
+    """Словари постов, затем комментариев автора."""
+    posts = Post.objects.visible().filter(author=author).select_related(
+        'group'
+    ).order_by('pub_date', 'id')
+    for post in posts.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': post.pk,
+            'date': post.pub_date.isoformat(),
+            'post_id': post.pk,
+            'group': post.group.slug if post.group else None,
+            'image': post.image.url if post.image else None,
+            'text': post.text,
+        }
+    comments = Comment.objects.filter(
+        author=author, post__is_deleted=False
+    ).order_by('created', 'id')
+    for comment in comments.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': comment.pk,
+            'date': comment.created.isoformat(),
+            'post_id': comment.post_id,
+            'group': None,
+            'image': None,
+            'text': comment.text,
+        }
+
+
+def ndjson_lines(author):
+    for row in rows(author):
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(author):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_FIELDS)
+    writer.writeheader()
+    for row in rows(author):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export(author, export_format):
+    """
+    Выгрузка кусками по EXPORT_BUFFER_SIZE символов.
+
+    Первая строка отдается сразу, чтобы клиент получил ответ, не дожидаясь
+    заполнения буфера.
+    """
+    lines = ndjson_lines if export_format == 'ndjson' else csv_lines
+    chunk, size, first = [], 0, True
+    for line in lines(author):
+        chunk.append(line)
+        size += len(line)
+        if first or size >= settings.EXPORT_BUFFER_SIZE:
+            yield ''.join(chunk)
+            chunk, size, first = [], 0, False
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,159 @@
+"""
+RSS- и Atom-ленты сайта, групп и авторов.
+
+Читалки лент опрашивают их каждые несколько минут, поэтому ленты
+кешируются целиком (core.page_cache) под версией своей области
+(posts.caching): сигналы posts.signals увеличивают ее, когда меняются
+посты сайта, группы или автора. Повторный опрос с If-None-Match получает
+304 по одной лишь версии из кеша, без рендеринга и запросов к БД.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from core.db_router import read_from_replica
+from core.page_cache import cached_page
+from .caching import (
+    author_version, conditional_feed, group_version, index_version,
+)
+from .models import Group, Post
+
+User = get_user_model()
+
+ITEM_FIELDS = (
+    'text',
+    'text_html',
+    'text_html_version',
+    'pub_date',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+    'group__title',
+)
+
+
+class PostsFeed(Feed):
+    """Последние посты сайта."""
+    title = 'Yatube: последние обновления на сайте'
+    description = 'Новые посты всех авторов Yatube.'
+
+    def link(self):
+        return reverse('Posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        posts = self.posts(obj).visible().select_related(
+            'author', 'group'
+        ).only(*ITEM_FIELDS)
+        return posts.order_by('-pub_date', '-pk')[:settings.FEED_ITEMS]
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(60)
+
+    def item_description(self, post):
+        return post.html
+
+    def item_link(self, post):
+        return reverse('Posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse(
+            'Posts:profile', kwargs={'username': post.author.username}
+        )
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class GroupFeed(PostsFeed):
+    """Последние посты группы."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: записи сообщества {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('Posts:group_list', kwargs={'slug': group.slug})
+
+    def posts(self, group):
+        return group.posts.all()
+
+
+class AuthorFeed(PostsFeed):
+    """Последние посты автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        name = author.get_full_name() or author.username
+        return f'Yatube: посты пользователя {name}'
+
+    def description(self, author):
+        return f'Новые посты пользователя {author.username} на Yatube.'
+
+    def link(self, author):
+        return reverse(
+            'Posts:profile', kwargs={'username': author.username}
+        )
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+class AtomMixin:
+    """Та же лента в формате Atom: описание идет в subtitle."""
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class AtomPostsFeed(AtomMixin, PostsFeed):
+    pass
+
+
+class AtomGroupFeed(AtomMixin, GroupFeed):
+    pass
+
+
+class AtomAuthorFeed(AtomMixin, AuthorFeed):
+    pass
+
+
+def cached_feed(feed, get_version):
+    """
+    View ленты: условный GET и кеш целого ответа под версией ленты.
+
+    При промахе кеша лента читается с реплики, если та догнала версию
+    (core.db_router.caught_up), иначе из основной базы.
+    """
+    return read_from_replica(
+        conditional_feed(get_version)(cached_page(get_version)(feed))
+    )
+
+
+posts_rss = cached_feed(PostsFeed(), index_version)
+posts_atom = cached_feed(AtomPostsFeed(), index_version)
+group_rss = cached_feed(GroupFeed(), group_version)
+group_atom = cached_feed(AtomGroupFeed(), group_version)
+author_rss = cached_feed(AuthorFeed(), author_version)
+author_atom = cached_feed(AtomAuthorFeed(), author_version)
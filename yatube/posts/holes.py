@@ -0,0 +1,50 @@
+"""Персональные фрагменты закешированных страниц постов."""
+from django.template.loader import render_to_string
+
+from core.page_cache import register_hole
+from .forms import CommentForm
+from .models import Follow
+
+
+@register_hole
+def switcher(request):
+    return render_to_string(
+        'posts/includes/switcher.html', request=request
+    )
+
+
+@register_hole
+def follow_button(request, username):
+    user = request.user
+    if not user.is_authenticated or user.username == username:
+        return ''
+    following = Follow.objects.filter(
+        user=user, author__username=username
+    ).exists()
+    return render_to_string(
+        'posts/includes/check_following.html',
+        {'profile': {'username': username}, 'following': following},
+        request=request
+    )
+
+
+@register_hole
+def post_actions(request, post_id, author):
+    if request.user.username != author:
+        return ''
+    return render_to_string(
+        'posts/includes/post_actions.html',
+        {'post_id': post_id},
+        request=request
+    )
+
+
+@register_hole
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'posts/includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request
+    )
@@ -0,0 +1,327 @@
+"""
+Массовый импорт групп, постов и комментариев из NDJSON или CSV.
+
+Формат записей тот же, что у posts.export, плюс поле author (имя
+пользователя) и записи type=group со slug, title и description.
+Записи читаются потоком и пишутся пачками: bulk_create внутри одной
+транзакции на пачку. Сигналы при bulk_create не срабатывают, поэтому
+их работа выполняется один раз в конце (finish): счетчики,
+полнотекстовый индекс, ленты подписчиков, миниатюры и версия лент.
+
+Комментарии ссылаются на посты по id из источника (post_id), поэтому
+пост должен встретиться во входных данных раньше своих комментариев.
+id новых строк назначает БД. Даты из источника ставятся отдельным
+bulk_update после вставки: bulk_create всегда пишет auto_now_add.
+Запись с неверным id или датой попадает в errors и не прерывает импорт.
+Картинка — имя файла в хранилище или URL из выгрузки; пост с картинкой,
+которой нет в хранилище, импортируется без нее и тоже попадает в errors.
+"""
+import csv
+import json
+from collections import defaultdict
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, search, thumbnails, timeline
+from .caching import bump_feed_version
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def read_records(file, input_format):
+    """Словари записей из файла, по одной за раз."""
+    if input_format == 'csv':
+        for row in csv.DictReader(file):
+            yield {key: value or None for key, value in row.items()}
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class RecordError(ValueError):
+    """Неверное значение в записи: она пропускается и идет в отчет."""
+
+
+def parse_id(record, field):
+    """Целое поле записи (id, post_id) или None, если его нет."""
+    value = record.get(field)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError(f'{field} не число: {value!r}')
+
+
+def parse_date(value):
+    """Дата записи; без даты — текущий момент, как при auto_now_add."""
+    if not value:
+        return timezone.now()
+    try:
+        date = parse_datetime(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise RecordError(f'неверная дата: {value!r}')
+    return date
+
+
+def parse_image(value):
+    """
+    Имя файла картинки в хранилище; export_posts выгружает его как URL.
+
+    Файла нет в хранилище — RecordError.
+    """
+    if not value:
+        return ''
+    if value.startswith(settings.MEDIA_URL):
+        value = unquote(value[len(settings.MEDIA_URL):])
+    if not default_storage.exists(value):
+        raise RecordError(f'нет файла картинки: {value!r}')
+    return value
+
+
+def fill_pks(model, objects, key_fields):
+    """
+    pk строк из bulk_create, если БД их не вернула (SQLite).
+
+    Строки ищутся по естественному ключу key_fields, последнее поле в
+    нем — дата, которую поставил auto_now_add, с точностью до
+    микросекунд. Чужая строка совпадет с ним, только если она точная
+    копия, и тогда все равно, какой из них достанется какой pk.
+    """
+    if not objects or objects[0].pk is not None:
+        return
+    date_field = key_fields[-1]
+    dates = [getattr(obj, date_field) for obj in objects]
+    rows = model._base_manager.filter(**{
+        f'{date_field}__range': (min(dates), max(dates))
+    }).order_by('pk').values_list(*key_fields, 'pk')
+    found = defaultdict(list)
+    for *key, pk in rows:
+        found[tuple(key)].append(pk)
+    for obj in objects:
+        key = tuple(getattr(obj, field) for field in key_fields)
+        obj.pk = found[key].pop(0)
+
+
+class Importer:
+    def __init__(self, batch_size, default_author=None):
+        self.batch_size = batch_size
+        self.default_author = default_author
+        self.users = {}
+        self.groups = {}
+        self.posts = {}
+        self.pending = {'group': [], 'post': [], 'comment': []}
+        self.created = {'group': 0, 'post': 0, 'comment': 0, 'user': 0}
+        self.skipped = 0
+        self.errors = []
+        self.authors = set()
+        self.image_posts = []
+
+    def add(self, record):
+        """Кладет запись в пачку; возвращает True, если пачка записана."""
+        kind = record.get('type')
+        if kind not in self.pending:
+            self.skipped += 1
+            return False
+        self.pending[kind].append(record)
+        if sum(map(len, self.pending.values())) >= self.batch_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Записывает накопленную пачку в одной транзакции."""
+        with transaction.atomic():
+            self._resolve_users()
+            self._create_groups(self.pending['group'])
+            self._create_posts(self.pending['post'])
+            self._create_comments(self.pending['comment'])
+        for records in self.pending.values():
+            records.clear()
+
+    @property
+    def total(self):
+        return sum(self.created[kind] for kind in self.pending)
+
+    def _author(self, record):
+        return record.get('author') or self.default_author
+
+    def _error(self, record, error):
+        self.errors.append(f'{error}: {record}')
+
+    def _resolve_users(self):
+        names = {
+            self._author(record)
+            for kind in ('post', 'comment')
+            for record in self.pending[kind]
+        } - set(self.users) - {None}
+        if not names:
+            return
+        self.users.update(
+            User.objects.filter(username__in=names).values_list(
+                'username', 'pk'
+            )
+        )
+        missing = names - set(self.users)
+        User.objects.bulk_create([
+            User(username=name, password=make_password(None))
+            for name in missing
+        ])
+        self.users.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
+        self.created['user'] += len(missing)
+
+    def _resolve_groups(self, slugs):
+        slugs = set(slugs) - set(self.groups) - {None}
+        if not slugs:
+            return
+        self.groups.update(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+        self._create_groups(
+            [{'slug': slug} for slug in slugs - set(self.groups)]
+        )
+
+    def _create_groups(self, records):
+        records = [
+            record for record in records
+            if record.get('slug') and record['slug'] not in self.groups
+        ]
+        if not records:
+            return
+        Group.objects.bulk_create(
+            [
+                Group(
+                    slug=record['slug'],
+                    title=record.get('title') or record['slug'],
+                    description=record.get('description') or '',
+                )
+                for record in records
+            ],
+            ignore_conflicts=True
+        )
+        slugs = [record['slug'] for record in records]
+        self.groups.update(
+            Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+        )
+        self.created['group'] += len(records)
+
+    def _post(self, record):
+        try:
+            image = parse_image(record.get('image'))
+        except RecordError as error:
+            self._error(record, error)
+            image = ''
+        post = Post(
+            author_id=self.users[self._author(record)],
+            group_id=self.groups.get(record.get('group')),
+            text=record['text'],
+            image=image,
+        )
+        post.render_text()
+        return post
+
+    def _create_posts(self, records):
+        records = [
+            record for record in records
+            if self.users.get(self._author(record)) and record.get('text')
+        ]
+        self.skipped += len(self.pending['post']) - len(records)
+        if not records:
+            return
+        self._resolve_groups(record.get('group') for record in records)
+        posts = []
+        sources = []
+        for record in records:
+            try:
+                source = (
+                    parse_id(record, 'id'), parse_date(record.get('date'))
+                )
+            except RecordError as error:
+                self._error(record, error)
+                continue
+            posts.append(self._post(record))
+            sources.append(source)
+        if not posts:
+            return
+        Post.objects.bulk_create(posts)
+        fill_pks(Post, posts, ('author_id', 'text', 'pub_date'))
+        for post, (source_id, date) in zip(posts, sources):
+            post.pub_date = date
+            if source_id is not None:
+                self.posts[source_id] = post.pk
+            self.authors.add(post.author_id)
+            if post.image:
+                self.image_posts.append(post.pk)
+        Post.objects.bulk_update(posts, ['pub_date'])
+        self.created['post'] += len(posts)
+
+    def _create_comments(self, records):
+        comments = []
+        dates = []
+        for record in records:
+            try:
+                source_post_id = parse_id(record, 'post_id')
+                date = parse_date(record.get('date'))
+            except RecordError as error:
+                self._error(record, error)
+                continue
+            post_id = self.posts.get(source_post_id)
+            author_id = self.users.get(self._author(record))
+            if not post_id or not author_id or not record.get('text'):
+                self.skipped += 1
+                continue
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=author_id,
+                text=record['text'],
+            ))
+            dates.append(date)
+        if not comments:
+            return
+        Comment.objects.bulk_create(comments)
+        fill_pks(
+            Comment, comments, ('post_id', 'author_id', 'text', 'created')
+        )
+        for comment, date in zip(comments, dates):
+            comment.created = date
+        Comment.objects.bulk_update(comments, ['created'])
+        self.created['comment'] += len(comments)
+
+    def finish(self):
+        """
+        Дописывает остаток и один раз делает то, что сделали бы сигналы.
+
+        Возвращает словарь «шаг: результат» для отчета.
+        """
+        self.flush()
+        result = {'counters': counters.reconcile()}
+        if search.available():
+            result['search'] = search.rebuild()
+        follows = Follow.objects.filter(
+            author_id__in=self.authors
+        ).select_related('user', 'author')
+        for follow in follows.iterator():
+            timeline.backfill(follow.user, follow.author)
+        result['timeline_follows'] = follows.count()
+        for post in Post.objects.filter(pk__in=self.image_posts).only(
+            'pk', 'image'
+        ).iterator():
+            thumbnails.enqueue_generate(post)
+        result['thumbnails'] = len(self.image_posts)
+        bump_feed_version()
+        return result
@@ -0,0 +1,206 @@
+import json
+import os
+import random
+import tempfile
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core.benchmark import run_concurrent
+from posts.counters import reconcile
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+Scenario = namedtuple('Scenario', 'method login build')
+
+
+SCENARIOS = {
+    'index': Scenario('get', False, lambda rnd, data: (
+        reverse('Posts:index'), None
+    )),
+    'group_list': Scenario('get', False, lambda rnd, data: (
+        reverse('Posts:group_list', kwargs={
+            'slug': rnd.choice(data['groups'])
+        }),
+        None
+    )),
+    'profile': Scenario('get', False, lambda rnd, data: (
+        reverse('Posts:profile', kwargs={
+            'username': rnd.choice(data['usernames'])
+        }),
+        None
+    )),
+    'post_detail': Scenario('get', False, lambda rnd, data: (
+        reverse('Posts:post_detail', kwargs={
+            'post_id': rnd.choice(data['posts'])
+        }),
+        None
+    )),
+    'follow_index': Scenario('get', True, lambda rnd, data: (
+        reverse('Posts:follow_index'), None
+    )),
+    'add_comment': Scenario('post', True, lambda rnd, data: (
+        reverse('Posts:add_comment', kwargs={
+            'post_id': rnd.choice(data['posts'])
+        }),
+        {'text': mixer.faker.sentence()}
+    )),
+    'post_create': Scenario('post', True, lambda rnd, data: (
+        reverse('Posts:post_create'),
+        {'text': mixer.faker.text(), 'group': rnd.choice(data['group_ids'])}
+    )),
+    'api_posts': Scenario('get', False, lambda rnd, data: (
+        reverse('api:post_list'), None
+    )),
+    'api_group_posts': Scenario('get', False, lambda rnd, data: (
+        reverse('api:post_list') + '?' + urlencode({
+            'group': rnd.choice(data['groups']),
+            'fields': 'id,pub_date,author',
+        }),
+        None
+    )),
+    'api_post_comments': Scenario('get', False, lambda rnd, data: (
+        reverse('api:comment_list', kwargs={
+            'post_id': rnd.choice(data['posts'])
+        }),
+        None
+    )),
+    'api_feed': Scenario('get', True, lambda rnd, data: (
+        reverse('api:feed'), None
+    )),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный замер страниц posts.urls и api.urls на '
+        'сгенерированных данных. Работает на отдельной временной базе и '
+        'печатает отчет в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок на одного пользователя.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на сценарий.'
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Неучитываемых запросов перед замером сценария.'
+        )
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=sorted(SCENARIOS),
+            default=list(SCENARIOS)
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для отчета JSON.')
+
+    def handle(self, *args, **options):
+        if (
+            options['users'] < 2
+            or options['groups'] < 1
+            or options['posts'] < 1
+        ):
+            raise CommandError(
+                'Нужно хотя бы 2 пользователя, 1 группа и 1 пост.'
+            )
+        with tempfile.TemporaryDirectory() as directory:
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'bench.sqlite3'
+            )
+            old_config = setup_databases(
+                verbosity=0, interactive=False, keepdb=False
+            )
+            try:
+                data = self.seed(options)
+                report = {
+                    'dataset': {
+                        key: options[key] for key in (
+                            'users', 'groups', 'posts', 'comments',
+                            'follows', 'seed',
+                        )
+                    },
+                    'concurrency': options['concurrency'],
+                    'scenarios': {
+                        name: self.run(SCENARIOS[name], data, options)
+                        for name in options['scenarios']
+                    },
+                }
+            finally:
+                connection.close()
+                teardown_databases(old_config, verbosity=0)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def seed(self, options):
+        """Заполняет базу пользователями, группами, постами и подписками."""
+        rnd = random.Random(options['seed'])
+        mixer.faker.seed_instance(options['seed'])
+        users = mixer.cycle(options['users']).blend(User)
+        groups = mixer.cycle(options['groups']).blend(Group)
+        follows = min(options['follows'], len(users) - 1)
+        for user in users:
+            authors = rnd.sample([u for u in users if u != user], follows)
+            Follow.objects.bulk_create(
+                [Follow(user=user, author=author) for author in authors]
+            )
+        posts = mixer.cycle(options['posts']).blend(
+            Post,
+            author=lambda: rnd.choice(users),
+            group=lambda: rnd.choice(groups),
+            image=''
+        )
+        mixer.cycle(options['comments']).blend(
+            Comment,
+            author=lambda: rnd.choice(users),
+            post=lambda: rnd.choice(posts)
+        )
+        reconcile()
+        return {
+            'users': users,
+            'usernames': [user.username for user in users],
+            'groups': [group.slug for group in groups],
+            'group_ids': [group.pk for group in groups],
+            'posts': [post.pk for post in posts],
+        }
+
+    def run(self, scenario, data, options):
+        """Замер одного сценария: свой клиент и ГСЧ в каждом потоке."""
+        cache.clear()
+
+        def make_worker():
+            client = Client()
+            rnd = random.Random()
+            if scenario.login:
+                client.force_login(rnd.choice(data['users']))
+            request = getattr(client, scenario.method)
+
+            def worker():
+                url, payload = scenario.build(rnd, data)
+                return request(url, payload).status_code < 400
+            return worker
+
+        if options['warmup']:
+            run_concurrent(make_worker, options['warmup'], 1)
+        return run_concurrent(
+            make_worker, options['requests'], options['concurrency']
+        )
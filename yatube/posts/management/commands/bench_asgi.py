@@ -0,0 +1,169 @@
+import asyncio
+import random
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.test import Client
+
+from core.asgi import AsgiHandler, build_environ
+from core.benchmark import summarize
+from .bench import SCENARIOS
+from .bench import Command as BenchCommand
+
+READ_SCENARIOS = [
+    name for name, scenario in SCENARIOS.items() if scenario.method == 'get'
+]
+
+
+class Command(BenchCommand):
+    help = (
+        'Сравнение sync (WSGI) и async (ASGI) воркеров с одинаковым числом '
+        'потоков при множестве медленных клиентов. Медленный клиент '
+        'держит поток sync-воркера, пока передает запрос и принимает ответ.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Потоков у sync-воркера и в пуле ASGI.'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Секунд на передачу запроса и столько же на прием ответа.'
+        )
+        parser.set_defaults(concurrency=64, scenarios=READ_SCENARIOS)
+
+    def handle(self, *args, **options):
+        writes = set(options['scenarios']) - set(READ_SCENARIOS)
+        if writes:
+            raise CommandError(
+                'Сравниваются только сценарии чтения, не: '
+                + ', '.join(sorted(writes))
+            )
+        super().handle(*args, **options)
+
+    def run(self, scenario, data, options):
+        """Оба режима на одном сценарии: {'sync': ..., 'async': ...}."""
+        cookies = []
+        if scenario.login:
+            for user in data['users']:
+                client = Client()
+                client.force_login(user)
+                cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+                cookies.append(f'{cookie.key}={cookie.value}')
+
+        def make_scope(rnd):
+            url, _ = scenario.build(rnd, data)
+            path, _, query = url.partition('?')
+            headers = [(b'host', b'localhost')]
+            if cookies:
+                headers.append((b'cookie', rnd.choice(cookies).encode()))
+            return {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': query.encode(),
+                'headers': headers,
+            }
+
+        report = {}
+        for mode, runner in (('sync', self.run_sync),
+                             ('async', self.run_async)):
+            cache.clear()
+            if options['warmup']:
+                runner(make_scope, options['warmup'], 1, options)
+            report[mode] = runner(
+                make_scope, options['requests'], options['concurrency'],
+                options
+            )
+        return report
+
+    def run_sync(self, make_scope, total, concurrency, options):
+        """Клиенты-потоки ждут свободный поток воркера на весь обмен."""
+        handler = WSGIHandler()
+        slots = threading.BoundedSemaphore(options['workers'])
+        delay = options['client_delay']
+        remaining = iter(range(total))
+        lock = threading.Lock()
+        latencies, errors = [], 0
+
+        def client():
+            nonlocal errors
+            rnd = random.Random()
+            while next(remaining, None) is not None:
+                scope = make_scope(rnd)
+                started = time.perf_counter()
+                with slots:
+                    time.sleep(delay)
+                    status = []
+                    b''.join(handler(
+                        build_environ(scope, BytesIO()),
+                        lambda line, headers, exc_info=None: status.append(
+                            int(line.split(' ', 1)[0])
+                        )
+                    ))
+                    time.sleep(delay)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    errors += status[0] >= 400
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(latencies, time.perf_counter() - started,
+                         errors=errors)
+
+    def run_async(self, make_scope, total, concurrency, options):
+        """Клиенты-корутины; поток пула занят только работой Django."""
+        application = AsgiHandler(
+            WSGIHandler(), max_workers=options['workers']
+        )
+        delay = options['client_delay']
+        remaining = iter(range(total))
+        latencies, errors = [], 0
+
+        async def request(scope):
+            status = []
+
+            async def receive():
+                await asyncio.sleep(delay)
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body', False):
+                    await asyncio.sleep(delay)
+
+            await application(scope, receive, send)
+            return status[0]
+
+        async def client():
+            nonlocal errors
+            rnd = random.Random()
+            while next(remaining, None) is not None:
+                started = time.perf_counter()
+                status = await request(make_scope(rnd))
+                latencies.append(time.perf_counter() - started)
+                errors += status >= 400
+
+        async def main():
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+
+        started = time.perf_counter()
+        try:
+            asyncio.run(main())
+        finally:
+            for executor in application.executors:
+                executor.shutdown(wait=True)
+        return summarize(latencies, time.perf_counter() - started,
+                         errors=errors)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в очередь подготовку миниатюр для картинок постов, у '
+        'которых их еще нет (например, загруженных до фоновой генерации).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Ставить в очередь все картинки, а не только без миниатюр.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.visible().exclude(image='').only(
+            'pk', 'image'
+        ).order_by('pk')
+        total = 0
+        for post in posts.iterator():
+            if options['all'] or thumbnails.is_missing(post):
+                total += thumbnails.enqueue_generate(post, requeue=True)
+        self.stdout.write(f'Поставлено в очередь картинок: {total}')
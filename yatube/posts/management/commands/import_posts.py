@@ -0,0 +1,67 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from posts.importer import Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Массовый импорт групп, постов и комментариев из NDJSON или CSV '
+        '(формат export_posts, см. posts.importer).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с записями или - для stdin.')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='По умолчанию по расширению файла.'
+        )
+        parser.add_argument(
+            '--author',
+            help='Автор записей, в которых нет поля author.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Записей в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        importer = Importer(options['batch_size'], options['author'])
+        started = time.perf_counter()
+        source = (
+            nullcontext(sys.stdin) if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        with source as file:
+            for record in read_records(file, input_format):
+                if importer.add(record):
+                    self.progress(importer, started)
+        self.stdout.write('Пересчет счетчиков, индекса и лент...')
+        result = importer.finish()
+        self.progress(importer, started)
+        created = ', '.join(
+            f'{kind}: {count}' for kind, count in importer.created.items()
+        )
+        self.stdout.write(
+            f'Создано {created}; пропущено {importer.skipped}; '
+            f'с ошибками {len(importer.errors)}'
+        )
+        for error in importer.errors:
+            self.stderr.write(f'Ошибка в записи: {error}')
+        for step, value in result.items():
+            self.stdout.write(f'{step}: {value}')
+
+    def progress(self, importer, started):
+        elapsed = time.perf_counter() - started
+        rate = importer.total / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Импортировано {importer.total} записей за {elapsed:.1f} с '
+            f'({rate:.0f} записей/с)'
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.rendering import RENDER_VERSION
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново рендерит HTML текста постов, посчитанный старой версией '
+        'posts.rendering.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Постов в одном запросе на обновление.'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Рендерить все посты, а не только устаревшие.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('text').order_by('pk')
+        if not options['all']:
+            posts = posts.exclude(text_html_version=RENDER_VERSION)
+        total = last = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last)[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                post.render_text()
+            Post.objects.bulk_update(
+                batch, ['text_html', 'text_html_version']
+            )
+            total += len(batch)
+            last = batch[-1].pk
+        self.stdout.write(f'Обновлено постов: {total}')
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:39
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+
+BATCH_SIZE = 500
+
+
+def render_texts(apps, schema_editor):
+    # Копия posts.rendering версии 1: миграция не должна зависеть от того,
+    # как рендеринг изменится позже, это забота команды render_posts.
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('text').order_by('pk')
+    last = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            break
+        for post in batch:
+            post.text_html = linebreaks(post.text, autoescape=True)
+            post.text_html_version = 1
+        Post.objects.bulk_update(batch, ['text_html', 'text_html_version'])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_is_deleted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия HTML текста'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
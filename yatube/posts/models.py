@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.safestring import mark_safe
+
+from .rendering import RENDER_VERSION, render
 
 User = get_user_model()
 
@@ -8,6 +11,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
 
     def __str__(self):
         return self.title
@@ -17,11 +21,44 @@ class Group(models.Model):
         verbose_name = 'Группа'
 
 
+class PostQuerySet(models.QuerySet):
+    # Поля, которые выводит карточка поста includes/post_card.html.
+    # text нужен и для устаревшего HTML, который рендерится на лету.
+    FEED_FIELDS = (
+        'text',
+        'text_html',
+        'text_html_version',
+        'pub_date',
+        'image',
+        'author__username',
+        'author__first_name',
+        'author__last_name',
+        'group__slug',
+    )
+
+    def visible(self):
+        """Посты без помеченных на удаление."""
+        return self.filter(is_deleted=False)
+
+    def for_feed(self):
+        """Посты для лент: автор и группа одним запросом, без лишних полей."""
+        return self.visible().select_related('author', 'group').only(
+            *self.FEED_FIELDS
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
     )
+    # HTML текста считается в save(), см. posts.rendering.
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    text_html_version = models.PositiveSmallIntegerField(
+        'Версия HTML текста',
+        default=0,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
@@ -47,14 +84,53 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0
+    )
+    # Удаленный пост сразу скрыт, а строки и файлы чистит posts.purge.
+    is_deleted = models.BooleanField('Удален', default=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def html(self):
+        """HTML текста; устаревший рендерится заново до render_posts."""
+        if self.text_html_version != RENDER_VERSION:
+            return mark_safe(render(self.text))
+        return mark_safe(self.text_html)
+
+    def render_text(self):
+        self.text_html = render(self.text)
+        self.text_html_version = RENDER_VERSION
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.render_text()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'text_html', 'text_html_version'
+                }
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -86,6 +162,12 @@ class Comment(models.Model):
         ordering = ['-created']
         verbose_name = 'Комментарий'  # Название группы в Админ панели.
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -104,3 +186,112 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Автор: {self.author}, Подписчик: {self.user}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
+
+
+class Timeline(models.Model):
+    """
+    Материализованная лента подписок: строка на пару подписчик-пост.
+
+    Заполняется при публикации поста (fan-out on write),
+    поэтому лента /follow/ читается одним диапазоном по индексу.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор постов'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    def __str__(self):
+        return f'Лента {self.user}: {self.post}'
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_feed_idx'
+            ),
+            models.Index(
+                fields=['user', 'author', '-pub_date'],
+                name='timeline_user_author_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Счетчики пользователя, которые иначе считались бы COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0
+    )
+
+    def __str__(self):
+        return f'Счетчики {self.user}'
+
+    class Meta:
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+
+class PostSearch(models.Model):
+    """
+    Полнотекстовый индекс постов — виртуальная таблица SQLite FTS5.
+
+    Таблица создается миграцией и синхронизируется сигналами Post,
+    поэтому Django ей не управляет. rowid таблицы совпадает с id поста.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='+',
+        verbose_name='Пост'
+    )
+    text = models.TextField('Текст поста')
+    rank = models.FloatField('Релевантность')
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
@@ -0,0 +1,52 @@
+"""
+Удаление постов: сразу скрываем, потом чистим в фоне.
+
+soft_delete() помечает пост удаленным в транзакции запроса: пост
+пропадает из лент, ленты подписок, поиска и счетчиков, а сигнал
+увеличивает версию кеша. Комментарии, сам пост и файлы картинки
+удаляет задача purge_post пачками, не загружая все комментарии в
+память.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from core.jobs import enqueue, task
+from . import counters, thumbnails
+from .caching import bump_on_commit
+from .models import Comment, Post, Timeline
+
+
+def soft_delete(post):
+    post.is_deleted = True
+    post.save(update_fields=['is_deleted'])
+    Timeline.objects.filter(post=post).delete()
+    counters.post_removed(post)
+    enqueue(purge_post, post.pk, key=f'purge_post:{post.pk}')
+
+
+@task()
+def purge_post(post_id):
+    post = Post.objects.filter(pk=post_id, is_deleted=True).first()
+    if post is None:
+        return
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Comment.objects.filter(post_id=post_id).values_list(
+                    'pk', flat=True
+                )[:settings.PURGE_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            # Без сигналов и загрузки строк: на комментарии ничего не
+            # ссылается, а скрыты они вместе с постом еще в soft_delete.
+            # QuerySet.delete() вызвал бы сигналы для каждой строки.
+            comments = Comment.objects.filter(pk__in=batch)
+            comments._raw_delete(comments.db)
+    # Сигнал invalidate_comments при удалении выше не срабатывал,
+    # поэтому версии комментариев сбрасываются здесь, один раз на пост.
+    bump_on_commit(f'post:{post_id}', 'comments')
+    # Удаление поста один раз сбрасывает закешированные страницы.
+    post.delete()
+    if post.image:
+        thumbnails.delete_files(post.image.name)
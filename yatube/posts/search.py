@@ -0,0 +1,99 @@
+"""
+Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts хранит копию текста поста под rowid, равным id
+поста, и обновляется сигналами Post. Результаты упорядочены по bm25
+(колонка rank) и листаются по ключу (rank, rowid).
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post, PostSearch
+
+TABLE = PostSearch._meta.db_table
+# Управляющие символы не встречаются в тексте поста после экранирования,
+# ими snippet() отмечает найденные слова.
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """
+    Превращает пользовательский запрос в выражение MATCH.
+
+    Каждое слово берется в кавычки, поэтому операторы FTS5 из ввода
+    не интерпретируются, а слова объединяются через AND.
+    """
+    words = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def index_post(post):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE}(rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def unindex_post(post_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    """Перестраивает индекс по всем постам, возвращает число записей."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE}(rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table} '
+            f'WHERE NOT is_deleted'
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLE}({TABLE}) VALUES (%s)', ['optimize']
+        )
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def matching(query):
+    """Записи индекса, подходящие под запрос, без порядка и сниппетов."""
+    match = match_expression(query)
+    if not match or not available():
+        return PostSearch.objects.none()
+    return PostSearch.objects.extra(
+        where=[f'"{TABLE}" MATCH %s'], params=[match]
+    )
+
+
+def search(query):
+    """Найденные записи с рангом и сниппетом; посты подгружены join-ом."""
+    snippet = (
+        f"snippet({TABLE}, 0, '{MARK_START}', '{MARK_END}', '…', 24)"
+    )
+    return matching(query).annotate(
+        snippet_source=RawSQL(snippet, [])
+    ).select_related('post__author', 'post__group')
+
+
+def highlight(snippet):
+    """Экранирует сниппет и выделяет найденные слова тегом <mark>."""
+    return mark_safe(
+        escape(snippet or '').replace(
+            MARK_START, '<mark>'
+        ).replace(MARK_END, '</mark>')
+    )
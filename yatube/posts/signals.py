@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search, timeline
+from .caching import bump_on_commit
+from .models import Comment, Group, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """Заводит счетчики новому пользователю."""
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    """Разносит новый пост по лентам подписчиков автора."""
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    """Обновляет пост в полнотекстовом индексе."""
+    if raw:
+        return
+    if instance.is_deleted:
+        search.unindex_post(instance.pk)
+    else:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Убирает удаленный пост из полнотекстового индекса."""
+    search.unindex_post(instance.pk)
+
+
+def post_scopes(post):
+    """Области версий, которые показывают пост."""
+    scopes = ['index', f'post:{post.pk}', f'author:{post.author_id}']
+    for group_id in {post.group_id, getattr(post, '_old_group_id', None)}:
+        if group_id is not None:
+            scopes.append(f'group:{group_id}')
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, update_fields=None, raw=False,
+                   **kwargs):
+    """Запоминает прежнюю группу: ее лента тоже меняется при переносе."""
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'group' not in update_fields:
+        return
+    instance._old_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    """Сбрасывает ленты и страницы, где виден пост."""
+    bump_on_commit(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    """Комментарий виден только на странице своего поста."""
+    bump_on_commit(f'post:{instance.post_id}', 'comments')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def invalidate_all(sender, created=False, update_fields=None, **kwargs):
+    """
+    Название группы и имя автора выводятся на многих страницах, поэтому
+    их изменение меняет общую эпоху. Новые группа и пользователь еще
+    нигде не показаны, кроме списка групп.
+    """
+    # Вход пользователя обновляет только last_login, ленты он не меняет.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    if created:
+        bump_on_commit('index')
+        return
+    bump_on_commit()
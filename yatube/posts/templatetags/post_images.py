@@ -0,0 +1,11 @@
+from django import template
+
+from posts.thumbnails import cached_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, variant):
+    """Готовая миниатюра картинки или None, миниатюры здесь не создаются."""
+    return cached_thumbnail(image, variant)
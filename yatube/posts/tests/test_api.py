@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import counters, timeline
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryBudgetMixin, run_on_commit
+
+User = get_user_model()
+
+
+@override_settings(API_PAGE_SIZE=3)
+class ApiTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}',
+                                group=cls.group if i % 2 else None)
+            for i in range(7)
+        ]
+        Post.objects.create(author=cls.author, text='Удален',
+                            is_deleted=True)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        timeline.backfill(cls.reader, cls.author)
+        counters.reconcile()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def collect(self, client, url):
+        """Все страницы списка по ссылкам next."""
+        results = []
+        while url:
+            data = client.get(url).json()
+            results += data['results']
+            url = data['next']
+        return results
+
+    def test_posts_cursor_pagination(self):
+        """Ссылки next проходят все видимые посты без повторов."""
+        results = self.collect(self.guest_client, reverse('api:post_list'))
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.pk for post in reversed(self.posts)]
+        )
+        response = self.guest_client.get(reverse('api:post_list'))
+        second = self.guest_client.get(response.json()['next']).json()
+        first = self.guest_client.get(second['previous']).json()
+        self.assertEqual(first['results'], response.json()['results'])
+
+    def test_embedded_author_and_group(self):
+        """Автор и группа встроены в пост и читаются тем же запросом."""
+        url = reverse('api:post_list') + '?group=group'
+        response = self.assertQueryBudget(self.guest_client, url, 1)
+        post = response.json()['results'][0]
+        self.assertEqual(
+            post['author'], {'username': 'author', 'name': 'Лев Толстой'}
+        )
+        self.assertEqual(post['group'], {'slug': 'group', 'title': 'Группа'})
+        self.assertEqual(post['id'], self.posts[5].pk)
+
+    def test_fields_select_only_their_columns(self):
+        """?fields= ограничивает и ответ, и колонки в SQL."""
+        url = reverse('api:post_list') + '?fields=id,author'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'author'}
+        )
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('"username"', sql)
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('"posts_group"', sql)
+
+    def test_bad_parameters(self):
+        """Неизвестные поля, неверный limit и cursor дают 400."""
+        url = reverse('api:post_list')
+        for query in ('?fields=id,secret', '?limit=0', '?limit=x',
+                      '?cursor=broken'):
+            with self.subTest(query=query):
+                response = self.guest_client.get(url + query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('detail', response.json())
+
+    def test_not_found_and_deleted(self):
+        """Удаленный пост и его комментарии отдают JSON 404."""
+        deleted = Post.objects.get(is_deleted=True)
+        for url in (
+            reverse('api:comment_list', kwargs={'post_id': 0}),
+            reverse('api:post_detail', kwargs={'post_id': deleted.pk}),
+            reverse('api:comment_list', kwargs={'post_id': deleted.pk}),
+            reverse('api:group_detail', kwargs={'slug': 'missing'}),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response['Content-Type'],
+                                 'application/json')
+
+    def test_comments_groups_and_follows(self):
+        """Комментарии поста, группы и подписки пользователя."""
+        # Автор поста для версии и комментарии; сам пост не читается.
+        comments = self.assertQueryBudget(self.guest_client, reverse(
+            'api:comment_list', kwargs={'post_id': self.posts[0].pk}
+        ), 2).json()['results']
+        self.assertEqual(comments[0]['text'], 'Комментарий')
+        self.assertEqual(comments[0]['author']['username'], 'reader')
+        group = self.guest_client.get(
+            reverse('api:group_detail', kwargs={'slug': 'group'})
+        ).json()
+        self.assertEqual(group['posts_count'], 3)
+        follows = self.reader_client.get(
+            reverse('api:follow_list')
+        ).json()['results']
+        self.assertEqual(follows[0]['author']['username'], 'author')
+
+    def test_feed(self):
+        """Лента подписок требует входа и листается по записям ленты."""
+        response = self.guest_client.get(reverse('api:feed'))
+        self.assertEqual(response.status_code, 401)
+        url = reverse('api:feed') + '?fields=id'
+        self.assertEqual(
+            self.collect(self.reader_client, url),
+            [{'id': post.pk} for post in reversed(self.posts)]
+        )
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304 до новой записи."""
+        url = reverse('api:post_list')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Новый пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_read_only(self):
+        """API принимает только GET и HEAD."""
+        response = self.reader_client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from core.asgi import AsgiHandler, build_environ
+from ..models import Post
+
+User = get_user_model()
+
+
+class InlineExecutor(Executor):
+    """Выполняет задачи в текущем потоке, внутри транзакции теста."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class AsgiHandlerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Пост через ASGI')
+
+    def setUp(self):
+        cache.clear()
+        self.application = AsgiHandler(
+            WSGIHandler(), executors=[InlineExecutor()]
+        )
+
+    def request(self, path, **scope):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.application({
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'localhost')],
+            **scope,
+        }, receive, send))
+        return messages
+
+    def test_page_served(self):
+        """Страница отдается через ASGI со статусом и телом."""
+        start, body = self.request(reverse('Posts:index'))
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'text/html', dict(start['headers'])[b'content-type'])
+        self.assertIn('Пост через ASGI', body['body'].decode())
+
+    def test_slots_created_in_server_loop(self):
+        """Семафор пула создается при первом запросе, а не при импорте."""
+        self.assertIsNone(self.application._slots)
+        for _ in range(2):
+            start, _ = self.request(reverse('Posts:index'))
+            self.assertEqual(start['status'], 200)
+        self.assertIsNotNone(self.application._slots)
+
+    def test_chunked_body_assembled(self):
+        """Тело запроса из нескольких сообщений собирается целиком."""
+        chunks = [b'text=', b'hello', b'']
+
+        async def receive():
+            body = chunks.pop(0)
+            return {
+                'type': 'http.request', 'body': body, 'more_body': bool(chunks)
+            }
+
+        body = asyncio.run(self.application.read_body(receive))
+        self.assertEqual(body.read(), b'text=hello')
+
+    def test_headers_in_environ(self):
+        """Повторные заголовки Cookie склеиваются через точку с запятой."""
+        environ = build_environ({
+            'method': 'GET',
+            'path': '/',
+            'headers': [(b'cookie', b'a=1'), (b'cookie', b'b=2')],
+        }, None)
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+
+    def test_root_path_moves_to_script_name(self):
+        """Префикс монтирования из root_path уходит в SCRIPT_NAME."""
+        environ = build_environ({
+            'method': 'GET',
+            'path': '/yatube/posts/1/',
+            'root_path': '/yatube',
+        }, None)
+        self.assertEqual(environ['SCRIPT_NAME'], '/yatube')
+        self.assertEqual(environ['PATH_INFO'], '/posts/1/')
+
+    def test_streaming_response_stays_in_one_thread(self):
+        """Потоковый ответ читается и закрывается в потоке view."""
+        threads = []
+
+        def application(environ, start_response):
+            threads.append(threading.get_ident())
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return StreamingHttpResponse(chunks())
+
+        def chunks():
+            for chunk in (b'a', b'b'):
+                threads.append(threading.get_ident())
+                yield chunk
+
+        handler = AsgiHandler(application, max_workers=2)
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        try:
+            asyncio.run(handler(
+                {'type': 'http', 'method': 'GET', 'path': '/'},
+                receive, send
+            ))
+        finally:
+            for executor in handler.executors:
+                executor.shutdown(wait=True)
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in messages[1:]),
+            b'ab'
+        )
+        self.assertEqual(len(set(threads)), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..caching import (
+    author_version, bump_feed_version, get_feed_version, group_version,
+    index_version, post_version,
+)
+from ..models import Comment, Group, Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+class ScopedVersionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other-group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def versions(self):
+        return {
+            'index': index_version(),
+            'group': group_version('group'),
+            'other_group': group_version('other-group'),
+            'author': author_version('author'),
+            'other': author_version('other'),
+            'post': post_version(self.post.pk),
+        }
+
+    def changed(self, action):
+        before = self.versions()
+        with run_on_commit():
+            action()
+        after = self.versions()
+        return {scope for scope in before if before[scope] != after[scope]}
+
+    def test_comment_changes_only_its_post(self):
+        """Комментарий меняет версию только своего поста."""
+        self.assertEqual(
+            self.changed(lambda: Comment.objects.create(
+                post=self.post, author=self.other, text='Комментарий'
+            )),
+            {'post'}
+        )
+
+    def test_post_changes_its_feeds(self):
+        """Пост меняет ленту сайта, своей группы и автора."""
+        self.assertEqual(
+            self.changed(lambda: Post.objects.create(
+                author=self.other, text='Новый', group=self.other_group
+            )),
+            {'index', 'other_group', 'other'}
+        )
+
+    def test_moved_post_changes_both_groups(self):
+        """Перенос поста меняет ленты старой и новой группы."""
+        def move():
+            self.post.group = self.other_group
+            self.post.save()
+        self.assertEqual(
+            self.changed(move),
+            {'index', 'group', 'other_group', 'author', 'post'}
+        )
+
+    def test_login_changes_nothing(self):
+        """Вход пользователя не сбрасывает кеш."""
+        version = get_feed_version()
+        self.client.force_login(self.author)
+        self.assertEqual(self.changed(lambda: None), set())
+        self.assertEqual(get_feed_version(), version)
+
+    def test_rename_changes_everything(self):
+        """Новое имя автора видно везде, поэтому меняется эпоха."""
+        def rename():
+            self.other.first_name = 'Новое имя'
+            self.other.save()
+        self.assertEqual(self.changed(rename), set(self.versions()))
+
+    def test_versions_change_after_commit(self):
+        """До коммита версии прежние: другие запросы видят старые строки."""
+        before = self.versions()
+        with run_on_commit():
+            Comment.objects.create(
+                post=self.post, author=self.other, text='Комментарий'
+            )
+            self.assertEqual(self.versions(), before)
+        self.assertNotEqual(self.versions()['post'], before['post'])
+
+    def test_versions_grow_after_cache_clear(self):
+        """После очистки кеша версия больше любой выданной раньше."""
+        get_feed_version('index')
+        for _ in range(1000):
+            bump_feed_version('index')
+        before = get_feed_version('index').split('.')
+        cache.clear()
+        after = get_feed_version('index').split('.')
+        for old, new in zip(before, after):
+            self.assertGreater(int(new), int(old))
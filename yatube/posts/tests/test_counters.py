@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Описание'
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание и удаление поста меняет счетчики автора и группы."""
+        self.author_client.post(
+            reverse('Posts:post_create'),
+            {'text': 'Пост', 'group': self.group.pk}
+        )
+        post = Post.objects.get()
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.author_client.post(
+            reverse('Posts:post_del', kwargs={'post_id': post.pk})
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_comment_counter(self):
+        """Комментарий увеличивает счетчик комментариев поста."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.reader_client.post(
+            reverse('Posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счетчики подписчиков и подписок."""
+        kwargs = {'username': self.author.username}
+        self.reader_client.get(reverse('Posts:profile_follow', kwargs=kwargs))
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse('Posts:profile_unfollow', kwargs=kwargs)
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_repeated_follow_and_unfollow(self):
+        """Повторные подписка и отписка не меняют счетчики дважды."""
+        kwargs = {'username': self.author.username}
+        for _ in range(2):
+            self.reader_client.get(
+                reverse('Posts:profile_follow', kwargs=kwargs)
+            )
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(), 1
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        for _ in range(2):
+            self.reader_client.get(
+                reverse('Posts:profile_unfollow', kwargs=kwargs)
+            )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_unfollow_single_delete(self):
+        """Отписка удаляет подписку одним DELETE, без SELECT перед ним."""
+        kwargs = {'username': self.author.username}
+        self.reader_client.get(reverse('Posts:profile_follow', kwargs=kwargs))
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(
+                reverse('Posts:profile_unfollow', kwargs=kwargs)
+            )
+        follow_queries = [
+            query['sql'] for query in queries.captured_queries
+            if '"posts_follow"' in query['sql']
+        ]
+        self.assertEqual(len(follow_queries), 1)
+        self.assertTrue(follow_queries[0].startswith('DELETE'))
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters исправляет дрейф счетчиков."""
+        Post.objects.create(author=self.author, text='Пост', group=self.group)
+        UserStats.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.group.refresh_from_db()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertIn('stats.posts_count: исправлено строк 1', out.getvalue())
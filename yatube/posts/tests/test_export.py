@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2, EXPORT_BUFFER_SIZE=1)
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}',
+                                group=group if i % 2 else None)
+            for i in range(5)
+        ]
+        Post.objects.create(author=cls.author, text='Удален',
+                            is_deleted=True)
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Комментарий'
+        )
+        cls.url = reverse(
+            'Posts:profile_export', kwargs={'username': 'author'}
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_ndjson_is_streamed_in_order(self):
+        """Посты по (дате, id), затем комментарии, построчно."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(row['type'], row['id']) for row in rows],
+            [('post', post.pk) for post in self.posts]
+            + [('comment', self.comment.pk)]
+        )
+        self.assertEqual(rows[1]['group'], 'group')
+
+    def test_csv(self):
+        """CSV с заголовком и теми же строками."""
+        response = self.client.get(self.url, {'format': 'csv'})
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]['text'], 'Комментарий')
+
+    def test_only_author_can_export(self):
+        """Чужую историю выгрузить нельзя."""
+        client = Client()
+        client.force_login(self.other)
+        self.assertEqual(client.get(self.url).status_code, 403)
+        response = self.client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_command(self):
+        """Команда export_posts пишет ту же выгрузку."""
+        out = io.StringIO()
+        call_command('export_posts', 'author', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 6)
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from .utils import QueryBudgetMixin, run_on_commit
+
+User = get_user_model()
+
+
+class FeedsTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание группы'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост в группе', group=cls.group
+        )
+        Post.objects.create(author=cls.other, text='Пост без группы')
+        Post.objects.create(author=cls.author, text='Удален',
+                            is_deleted=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_content(self):
+        """Ленты сайта, группы и автора содержат только свои посты."""
+        feeds = {
+            reverse('Posts:index_rss'): (
+                'application/rss+xml',
+                ['Пост в группе', 'Пост без группы'],
+            ),
+            reverse('Posts:group_atom', kwargs={'slug': 'group'}): (
+                'application/atom+xml',
+                ['Пост в группе'],
+            ),
+            reverse('Posts:profile_rss', kwargs={'username': 'other'}): (
+                'application/rss+xml',
+                ['Пост без группы'],
+            ),
+        }
+        for url, (content_type, texts) in feeds.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                content = response.content.decode()
+                for text in texts:
+                    self.assertIn(text, content)
+                self.assertNotIn('Удален', content)
+        response = self.client.get(
+            reverse('Posts:group_rss', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_is_cached_until_posts_change(self):
+        """Повторный опрос не ходит в БД, новый пост сбрасывает кеш."""
+        url = reverse('Posts:group_rss', kwargs={'slug': 'group'})
+        # Группа, посты и id группы для версии ленты.
+        self.assertQueryBudget(self.client, url, 3)
+        self.assertQueryBudget(self.client, url, 0)
+        with run_on_commit():
+            Post.objects.create(
+                author=self.author, text='Новый пост', group=self.group
+            )
+        self.assertIn('Новый пост', self.client.get(url).content.decode())
+
+    def test_conditional_get(self):
+        """Неизменная лента отвечает 304 на If-None-Match."""
+        url = reverse('Posts:profile_atom', kwargs={'username': 'author'})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.post.text = 'Исправленный пост'
+        with run_on_commit():
+            self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Исправленный пост', response.content.decode())
+
+    def test_missing_feed_is_never_not_modified(self):
+        """Лента удаленной или несуществующей группы — 404, а не 304."""
+        group = Group.objects.create(
+            title='Временная', slug='temporary', description='Описание'
+        )
+        url = reverse('Posts:group_rss', kwargs={'slug': 'temporary'})
+        etag = self.client.get(url)['ETag']
+        with run_on_commit():
+            group.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+        for slug in ('temporary', 'missing'):
+            with self.subTest(slug=slug):
+                response = self.client.get(
+                    reverse('Posts:group_rss', kwargs={'slug': slug}),
+                    HTTP_IF_NONE_MATCH='*'
+                )
+                self.assertEqual(response.status_code, 404)
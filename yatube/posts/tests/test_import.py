@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..caching import get_feed_version
+from ..models import Comment, Follow, Group, Post, Timeline
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def test_ndjson_import(self):
+        """Пачки записываются, после импорта пересчитано все производное."""
+        records = [
+            {'type': 'group', 'slug': 'old', 'title': 'Архив'},
+            {'type': 'post', 'id': 1, 'author': 'author', 'group': 'old',
+             'date': '2015-01-01T10:00:00+00:00', 'text': 'Первый\n\nпост'},
+            {'type': 'post', 'id': 2, 'author': 'newcomer',
+             'date': '2015-01-02T10:00:00+00:00', 'text': 'Второй'},
+            {'type': 'comment', 'post_id': 1, 'author': 'newcomer',
+             'date': '2015-01-03T10:00:00+00:00', 'text': 'Комментарий'},
+            {'type': 'comment', 'post_id': 99, 'author': 'author',
+             'text': 'К неизвестному посту'},
+            {'type': 'comment', 'post_id': 'первый', 'author': 'author',
+             'text': 'Неверный post_id'},
+            {'type': 'post', 'id': 3, 'author': 'author',
+             'date': 'вчера', 'text': 'Неверная дата'},
+        ]
+        path = self.write(
+            'archive.ndjson',
+            ''.join(json.dumps(record) + '\n' for record in records)
+        )
+        version = get_feed_version()
+        out = io.StringIO()
+        err = io.StringIO()
+        call_command('import_posts', path, '--batch-size', '2', stdout=out,
+                     stderr=err)
+
+        post = Post.objects.get(text='Первый\n\nпост')
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group.title, 'Архив')
+        self.assertEqual(post.html, '<p>Первый</p>\n\n<p>пост</p>')
+        self.assertEqual(post.comments_count, 1)
+        comment = Comment.objects.get()
+        self.assertEqual(
+            (comment.post, comment.author.username, comment.created.year),
+            (post, 'newcomer', 2015)
+        )
+        self.assertEqual(Group.objects.get(slug='old').posts_count, 1)
+        self.assertEqual(User.objects.get(username='newcomer').stats
+                         .posts_count, 1)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertNotEqual(get_feed_version(), version)
+        self.assertIn('пропущено 1; с ошибками 2', out.getvalue())
+        self.assertIn("post_id не число: 'первый'", err.getvalue())
+        self.assertIn("неверная дата: 'вчера'", err.getvalue())
+        self.assertFalse(Post.objects.filter(text='Неверная дата').exists())
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_export_can_be_imported(self):
+        """Выгрузка export_posts в CSV загружается обратно."""
+        Post.objects.create(author=self.author, text='Пост для переноса')
+        with self.settings(MEDIA_ROOT=self.directory):
+            image = Post.objects.create(
+                author=self.author, text='Пост с картинкой',
+                image=SimpleUploadedFile('картинка.gif', b'GIF89a')
+            ).image.name
+            exported = io.StringIO()
+            call_command('export_posts', 'author', '--format', 'csv',
+                         stdout=exported)
+            path = self.write('author.csv', exported.getvalue())
+            call_command('import_posts', path, '--author', 'reader',
+                         stdout=io.StringIO())
+        self.assertTrue(
+            Post.objects.filter(
+                author=self.reader, text='Пост для переноса'
+            ).exists()
+        )
+        self.assertEqual(
+            Post.objects.get(author=self.reader, text='Пост с картинкой')
+            .image.name,
+            image
+        )
+
+    def test_missing_image_is_reported(self):
+        """Пост с картинкой не из хранилища импортируется без нее."""
+        path = self.write('archive.ndjson', json.dumps(
+            {'type': 'post', 'author': 'author', 'text': 'Без файла',
+             'image': '/media/posts/missing.gif'}
+        ) + '\n')
+        err = io.StringIO()
+        call_command('import_posts', path, stdout=io.StringIO(), stderr=err)
+        self.assertEqual(Post.objects.get(text='Без файла').image, '')
+        self.assertIn("нет файла картинки: 'posts/missing.gif'",
+                      err.getvalue())
@@ -0,0 +1,115 @@
+import threading
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+User = get_user_model()
+calls = []
+
+
+@jobs.task()
+def remember(value):
+    calls.append(value)
+
+
+@jobs.task(max_attempts=2)
+def broken():
+    raise ValueError('Ошибка задачи')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def work(self):
+        jobs.work('test', threading.Event(), 0, once=True)
+
+    def test_job_runs_once(self):
+        """Задача из очереди выполняется и отмечается выполненной."""
+        job = jobs.enqueue(remember, 'значение')
+        self.work()
+        self.work()
+        job.refresh_from_db()
+        self.assertEqual(calls, ['значение'])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом не ставится повторно."""
+        first = jobs.enqueue(remember, 1, key='remember:1')
+        second = jobs.enqueue(remember, 2, key='remember:1')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual((first.enqueued, second.enqueued), (True, False))
+        self.work()
+        self.assertEqual(calls, [1])
+        self.assertFalse(jobs.enqueue(remember, 3, key='remember:1').enqueued)
+        again = jobs.enqueue(remember, 3, key='remember:1', requeue=True)
+        self.assertEqual((again.pk, again.enqueued), (first.pk, True))
+        self.work()
+        self.assertEqual(calls, [1, 3])
+
+    def test_delayed_job_waits(self):
+        """Отложенная задача не берется раньше срока."""
+        jobs.enqueue(remember, 1, delay=60)
+        self.work()
+        self.assertEqual(calls, [])
+
+    @override_settings(JOBS_BACKOFF=10)
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется позже, а после лимита — ошибка."""
+        job = jobs.enqueue(broken)
+        self.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=7))
+        self.assertIn('Ошибка задачи', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_stale_job_requeued(self):
+        """Задача упавшего воркера возвращается в очередь."""
+        job = jobs.enqueue(remember, 1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.work()
+        self.assertEqual(calls, [1])
+
+    def test_password_reset_mail_queued(self):
+        """Письмо восстановления пароля отправляется задачей очереди."""
+        User.objects.create_user(
+            username='forgetful',
+            email='forgetful@example.com',
+            password='old-password'
+        )
+        Client().post(
+            reverse('users:password_reset'),
+            {'email': 'forgetful@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.work()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['forgetful@example.com'])
+
+
+class RunWorkerTest(TransactionTestCase):
+    def test_runworker_once(self):
+        """runworker --once выполняет готовые задачи и завершается."""
+        jobs.enqueue(remember, 1)
+        call_command('runworker', '--once', '--threads', '1')
+        self.assertEqual(Job.objects.get().status, Job.DONE)
@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from ..models import Post
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            METRICS_FILE=os.path.join(directory.name, 'metrics'),
+            METRICS_TOKEN='secret',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = Client()
+
+    def test_requests_are_counted_per_view(self):
+        """Запросы попадают в гистограмму своего view."""
+        self.client.get(reverse('Posts:index'))
+        self.client.get(reverse('Posts:index'))
+        self.client.get(reverse('Posts:group_list', kwargs={'slug': 'none'}))
+        text = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="Posts:index"} 2',
+            text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{view="Posts:group_list"} 1',
+            text
+        )
+
+    def test_db_cache_and_render_are_recorded(self):
+        """Считаются запросы к БД, кеш и время рендеринга шаблонов."""
+        self.client.get(reverse('Posts:index'))
+        self.client.get(reverse('Posts:index'))
+        index = metrics.store().snapshot()['Posts:index']
+        size = metrics.HIST_SIZE
+        queries, hits, misses = index[len(metrics.HISTOGRAMS) * size:][:3]
+        self.assertGreater(queries, 0)
+        self.assertGreater(hits, 0)
+        self.assertGreater(misses, 0)
+        render_time = index[3 * size - 1]
+        self.assertGreater(render_time, 0)
+
+    def test_metrics_closed_without_token(self):
+        """Метрики не отдаются без токена, даже с локального адреса."""
+        for header in ('', 'Bearer wrong', 'secret'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    reverse('metrics'),
+                    REMOTE_ADDR='127.0.0.1',
+                    HTTP_AUTHORIZATION=header
+                )
+                self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_TOKEN=''):
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer '
+            )
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_many_counted_once(self):
+        """Ключ из get_many считается один раз, даже если он идет через get."""
+        cache.set('present', 1)
+        with metrics.collect() as collected:
+            cache.get_many(['present', 'absent'])
+        self.assertEqual(collected.cache_hits, 1)
+        self.assertEqual(collected.cache_misses, 1)
+
+    def test_other_caches_not_instrumented(self):
+        """Замеряется только кеш из CACHES, класс Django не меняется."""
+        other = LocMemCache('other', {})
+        other.set('present', 1)
+        with metrics.collect() as collected:
+            other.get('present')
+            other.get('absent')
+        self.assertEqual(collected.cache_hits, 0)
+        self.assertEqual(collected.cache_misses, 0)
@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
 from ..models import Group, Post
+from ..rendering import RENDER_VERSION
 
 User = get_user_model()
 
@@ -60,3 +64,50 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class PostRenderingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_html_is_rendered_on_save(self):
+        """HTML текста считается при сохранении и экранируется."""
+        post = Post.objects.create(author=self.user, text='<b>a</b>\n\nb')
+        post.refresh_from_db()
+        self.assertEqual(
+            post.text_html, '<p>&lt;b&gt;a&lt;/b&gt;</p>\n\n<p>b</p>'
+        )
+        self.assertEqual(post.text_html_version, RENDER_VERSION)
+        post.text = 'c'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.html, '<p>c</p>')
+
+    def test_stale_html_is_rendered_until_backfill(self):
+        """Устаревший HTML не выводится и обновляется командой."""
+        post = Post.objects.create(author=self.user, text='new')
+        Post.objects.filter(pk=post.pk).update(
+            text_html='<p>old</p>', text_html_version=0
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.html, '<p>new</p>')
+        call_command('render_posts', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.text_html, post.text_html_version),
+            ('<p>new</p>', RENDER_VERSION)
+        )
+
+    def test_stale_feed_html_needs_no_queries(self):
+        """Лента с устаревшим HTML не догружает текст по одному посту."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {i}') for i in range(3)
+        ])
+        posts = list(Post.objects.for_feed())
+        with self.assertNumQueries(0):
+            self.assertCountEqual(
+                [post.html for post in posts],
+                ['<p>Пост 0</p>', '<p>Пост 1</p>', '<p>Пост 2</p>']
+            )
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from .. import search
+from ..models import Comment, Follow, Group, Post, Timeline, UserStats
+
+User = get_user_model()
+
+
+class SoftDeleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.author, text='Пост про котов', group=self.group
+        )
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.reader, text=f'Ответ {i}')
+            for i in range(5)
+        ])
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client.post(
+            reverse('Posts:post_del', kwargs={'post_id': self.post.pk})
+        )
+
+    def test_deleted_post_hidden_everywhere(self):
+        """Удаленный пост сразу пропадает из лент, поиска и страницы."""
+        urls = (
+            reverse('Posts:index'),
+            reverse('Posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('Posts:profile', kwargs={'username': 'author'}),
+            reverse('Posts:follow_index'),
+            reverse('Posts:search') + '?q=котов',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertNotContains(response, 'Пост про котов')
+        response = self.reader_client.get(
+            reverse('Posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Timeline.objects.filter(post=self.post).exists())
+        if search.available():
+            self.assertFalse(search.matching('котов').exists())
+
+    def test_counters_updated_once(self):
+        """Счетчики уменьшаются при удалении и не меняются при очистке."""
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 0
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        jobs.run(Job.objects.get())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 0
+        )
+
+    @override_settings(PURGE_BATCH_SIZE=2)
+    def test_purge_removes_rows_in_batches(self):
+        """Очистка удаляет комментарии пачками и сам пост."""
+        jobs.run(Job.objects.get(name='posts.purge.purge_post'))
+        self.assertFalse(Comment.objects.filter(post=self.post).exists())
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_purge_bumps_versions_once(self):
+        """Комментарии удаляются без сигналов, версии меняются один раз."""
+        with mock.patch('posts.signals.bump_on_commit') as bump, \
+                mock.patch('posts.purge.bump_on_commit') as bump_comments:
+            jobs.run(Job.objects.get(name='posts.purge.purge_post'))
+        self.assertEqual(bump.call_count, 1)
+        bump_comments.assert_called_once_with(
+            f'post:{self.post.pk}', 'comments'
+        )
+
+
+class DeletePermissionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.url = reverse('Posts:post_del', kwargs={'post_id': cls.post.pk})
+
+    def test_only_author_deletes_by_post(self):
+        """Удалить пост может только автор и только POST-запросом."""
+        author_client = Client()
+        author_client.force_login(self.author)
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        response = Client().post(self.url)
+        self.assertRedirects(
+            response, reverse('users:login') + '?next=' + self.url
+        )
+        response = reader_client.post(self.url)
+        self.assertRedirects(response, reverse(
+            'Posts:post_detail', kwargs={'post_id': self.post.pk}
+        ))
+        self.assertEqual(author_client.get(self.url).status_code, 405)
+        self.assertTrue(Post.objects.visible().filter(pk=self.post.pk))
+        author_client.post(self.url)
+        self.assertFalse(Post.objects.visible().filter(pk=self.post.pk))
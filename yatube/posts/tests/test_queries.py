@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryBudgetMixin
+
+User = get_user_model()
+POSTS_ON_PAGE = 10
+
+
+class FeedQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Число запросов лент не зависит от числа постов на странице."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='group',
+            description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(POSTS_ON_PAGE):
+            group = Group.objects.create(
+                title=f'Группа {i}',
+                slug=f'group-{i}',
+                description='Описание'
+            )
+            Post.objects.create(author=cls.author, text=f'Пост {i}',
+                                group=group)
+            Post.objects.create(author=cls.author, text=f'Пост группы {i}',
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_query_budget(self):
+        """Ленты выполняют фиксированное число запросов."""
+        # Группе и профилю при холодном кеше нужен еще id области версии
+        # (posts.caching), дальше он берется из кеша.
+        budgets = {
+            reverse('Posts:index'): 1,
+            reverse('Posts:group_list', kwargs={'slug': 'group'}): 3,
+            reverse('Posts:profile', kwargs={'username': 'author'}): 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.guest_client, url, budget)
+
+    def test_follow_index_query_budget(self):
+        """Лента подписок выполняет фиксированное число запросов."""
+        # Сессия, пользователь, популярные авторы, страница ленты, посты.
+        response = self.assertQueryBudget(
+            self.reader_client, reverse('Posts:follow_index'), 5
+        )
+        self.assertEqual(len(response.context['page_obj']), POSTS_ON_PAGE)
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class CommentsQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Страница поста стоит одинаково при любом числе комментариев."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        for i in range(12):
+            commenter = User.objects.create_user(username=f'commenter{i}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_query_budget(self):
+        """Пост с автором, первая страница комментариев с авторами."""
+        # И автор поста для версии страницы при холодном кеше.
+        response = self.assertQueryBudget(
+            self.guest_client,
+            reverse('Posts:post_detail', kwargs={'post_id': self.post.pk}),
+            3
+        )
+        self.assertEqual(len(response.context['comments']), 5)
+
+    def test_comments_are_loaded_by_cursor(self):
+        """Фрагменты по курсору отдают все комментарии без повторов."""
+        url = reverse('Posts:post_comments', kwargs={'post_id': self.post.pk})
+        page = self.guest_client.get(url).context['comments']
+        seen = [comment.pk for comment in page]
+        while page.has_next():
+            page = self.assertQueryBudget(
+                self.guest_client, f'{url}?cursor={page.next_cursor}', 2
+            ).context['comments']
+            seen += [comment.pk for comment in page]
+        expected = list(
+            self.post.comments.order_by('-created', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import db_router
+from core.models import ReplicationMark
+from .. import caching
+from ..models import Post
+from .utils import run_on_commit
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.router = db_router.ReplicaRouter()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def read_in_view(self, pinned=False, write=False, caught_up=False):
+        @db_router.read_from_replica
+        def view():
+            if write:
+                self.router.db_for_write(Post)
+            if caught_up:
+                with db_router.caught_up():
+                    return self.router.db_for_read(Post)
+            return self.router.db_for_read(Post)
+
+        with db_router.request_state(pinned):
+            return view()
+
+    def test_reads_in_replica_views_go_to_replicas(self):
+        """Чтения во view с read_from_replica идут на реплику."""
+        self.assertEqual(self.read_in_view(), 'replica1')
+        with db_router.request_state(False):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_after_write_go_to_primary(self):
+        """После записи и при закреплении чтения идут в основную базу."""
+        self.assertEqual(self.read_in_view(write=True), 'default')
+        self.assertEqual(self.read_in_view(pinned=True), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_cached_content_waits_for_replica(self):
+        """Кешируемое читается с реплики, только если она догнала записи."""
+        before = ReplicationMark.objects.get().number
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Новый пост')
+        number = ReplicationMark.objects.get().number
+        self.assertGreater(number, before)
+        for replica_mark, db in ((None, 'default'), (number - 1, 'default'),
+                                 (number, 'replica1')):
+            with self.subTest(replica_mark=replica_mark):
+                with mock.patch.object(
+                    db_router, '_replica_mark', return_value=replica_mark
+                ):
+                    self.assertEqual(self.read_in_view(caught_up=True), db)
+        with db_router.request_state(False), db_router.caught_up():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_conditional_response_waits_for_replica(self):
+        """Ответ с ETag не читается с отставшей реплики."""
+        # Базы replica1 в DATABASES нет: ответ будет, только если
+        # отставшая реплика не используется.
+        db_router.mark_write()
+        with mock.patch.object(db_router, '_replica_mark', return_value=0):
+            response = Client().get(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_post_found_before_replica_sync(self):
+        """Пост, которого еще нет на реплике, ищется в основной базе."""
+        first = caching._first
+
+        def replica_lags(queryset, field):
+            if queryset._db == 'default':
+                return first(queryset, field)
+            return None
+
+        with mock.patch.object(caching, '_first', side_effect=replica_lags):
+            caching.post_version(self.post.pk)
+            with self.assertRaises(Http404):
+                caching.post_version(0)
+
+    def test_write_pins_user_to_primary(self):
+        """После записи пользователь на время читает из основной базы."""
+        response = self.client.post(
+            reverse('Posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 10)
+        # Базы replica1 в DATABASES нет: лента откроется, только если
+        # ее чтения закреплены за основной базой.
+        response = self.client.get(reverse('Posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_read_only_request_is_not_pinned(self):
+        """Запрос без записей не закрепляет пользователя."""
+        response = self.client.get(reverse('Posts:search'))
+        self.assertNotIn('pin_primary', response.cookies)
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, PostSearch
+
+User = get_user_model()
+SEARCH_URL = reverse('Posts:search')
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.cat_post = Post.objects.create(
+            author=cls.user,
+            text='Кот <b>спит</b> на диване'
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.user,
+            text='Собака гуляет во дворе'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query, **params):
+        response = self.guest_client.get(SEARCH_URL, {'q': query, **params})
+        return response, [result.post for result in response.context[
+            'page_obj'
+        ]]
+
+    def test_search_finds_post(self):
+        """Поиск находит пост по слову без учета регистра."""
+        _, posts = self.found('кот')
+        self.assertEqual(posts, [self.cat_post])
+
+    def test_search_highlights_escaped_snippet(self):
+        """Сниппет выделяет найденное слово и экранирует HTML поста."""
+        response, _ = self.found('спит')
+        content = response.content.decode()
+        self.assertIn('&lt;b&gt;<mark>спит</mark>&lt;/b&gt;', content)
+
+    def test_search_ignores_fts_syntax(self):
+        """Операторы FTS5 во вводе не ломают поиск."""
+        response, posts = self.found('кот" (*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(posts, [self.cat_post])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.dog_post.text = 'Кошка гуляет'
+        self.dog_post.save()
+        self.assertEqual(self.found('кошка')[1], [self.dog_post])
+        self.assertEqual(self.found('собака')[1], [])
+        self.cat_post.delete()
+        self.assertFalse(PostSearch.objects.filter(post_id=self.cat_post.pk))
+
+    def test_search_cursor_pagination(self):
+        """Результаты поиска листаются по токенам."""
+        for i in range(12):
+            Post.objects.create(author=self.user, text=f'Кот номер {i}')
+        response, first = self.found('кот')
+        page = response.context['page_obj']
+        self.assertEqual(len(first), 10)
+        _, second = self.found('кот', cursor=page.next_cursor)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(set(first) & set(second))
+
+    def test_rebuild_search_index(self):
+        """Команда rebuild_search_index заново индексирует все посты."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_post_fts')
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Проиндексировано постов: 2', out.getvalue())
+        self.assertEqual(self.found('собака')[1], [self.dog_post])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет по полнотекстовому индексу."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.dog_post]
+        )
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_get_set_add_delete(self):
+        """Основные операции кеша."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'другое'))
+        self.assertTrue(self.cache.add('new', 'значение'))
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.get('key', 'нет'), 'нет')
+
+    def test_expired_entry_missing(self):
+        """Просроченная запись не читается."""
+        self.cache.set('key', 'value', timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+
+    def test_shared_between_instances(self):
+        """Другой экземпляр (процесс) видит те же ключи."""
+        self.cache.set('key', 'value')
+        other = self.make_cache()
+        self.assertEqual(other.get('key'), 'value')
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_incr_atomic(self):
+        """incr из многих потоков не теряет обновления."""
+        self.cache.set('counter', 0)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: self.cache.incr('counter'), range(200)))
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_lru_eviction_by_entries(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        cache.set('hot', 'value')
+        for i in range(10):
+            cache.set(f'cold-{i}', i)
+            cache.connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key != ?',
+                [i, cache.make_key('hot')]
+            )
+        cache.set('overflow', 'value')
+        self.assertEqual(cache.get('hot'), 'value')
+        self.assertIsNone(cache.get('cold-0'))
+        entries = cache.connection.execute(
+            'SELECT entries FROM cache_totals'
+        ).fetchone()[0]
+        self.assertLessEqual(entries, 10)
+
+    def test_eviction_by_size(self):
+        """Суммарный объем значений не превышает MAX_SIZE."""
+        cache = self.make_cache(MAX_SIZE=10000)
+        for i in range(20):
+            cache.set(f'key-{i}', b'x' * 1000)
+        size = cache.connection.execute(
+            'SELECT bytes FROM cache_totals'
+        ).fetchone()[0]
+        self.assertLessEqual(size, 10000)
+        self.assertIsNotNone(cache.get('key-19'))
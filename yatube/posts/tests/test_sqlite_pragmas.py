@@ -0,0 +1,19 @@
+from django.db import connection
+from django.test import SimpleTestCase
+
+
+class SQLitePragmasTest(SimpleTestCase):
+    databases = {'default'}
+
+    def test_new_connections_are_tuned(self):
+        """Каждое соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            values = {}
+            for name in ('synchronous', 'cache_size', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        # 1 — NORMAL; журнал WAL у тестовой базы в памяти не включается.
+        self.assertEqual(
+            values, {'synchronous': 1, 'cache_size': -65536,
+                     'busy_timeout': 5000}
+        )
@@ -0,0 +1,89 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core import stampede
+from core.stampede import get_or_compute
+
+
+class StampedeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        stampede.stats.clear()
+        self.calls = 0
+
+    def compute(self, value='new', duration=0):
+        def func():
+            self.calls += 1
+            time.sleep(duration)
+            return value
+        return func
+
+    def test_fresh_value_is_not_recomputed(self):
+        """Свежее значение берется из кеша."""
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'new')
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'new')
+        self.assertEqual(self.calls, 1)
+
+    def test_concurrent_misses_compute_once(self):
+        """Из одновременных промахов значение считает один запрос."""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('key', self.compute(duration=0.2), 60)
+            ))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['new'] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(stampede.stats['recomputes'], 1)
+        self.assertEqual(stampede.stats['recomputes_prevented'], 7)
+
+    def test_stale_value_while_other_recomputes(self):
+        """Пока значение пересчитывают, остальные получают старое."""
+        cache.set('key', ('old', 0.1, time.time() - 1), 60)
+        cache.add('key:lock', 1)
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'old')
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(stampede.stats['recomputes_prevented'], 1)
+
+    def test_early_expiration_of_expensive_value(self):
+        """Дорогое значение пересчитывается до истечения срока."""
+        cache.set('key', ('old', 100, time.time() + 1), 60)
+        with mock.patch.object(stampede.random, 'random', return_value=0.5):
+            self.assertEqual(get_or_compute('key', self.compute(), 60), 'new')
+        cache.set('key', ('old', 0.001, time.time() + 60), 60)
+        with mock.patch.object(stampede.random, 'random', return_value=0.5):
+            self.assertEqual(get_or_compute('key', self.compute(), 60), 'old')
+
+    def test_lock_released_on_error(self):
+        """Ошибка при вычислении не оставляет блокировку."""
+        def fail():
+            raise ValueError
+        with self.assertRaises(ValueError):
+            get_or_compute('key', fail, 60)
+        self.assertIsNone(cache.get('key:lock'))
+
+    def test_template_tag(self):
+        """{% cache %} из coalesced_cache кеширует фрагмент по тем же
+        ключам, что и встроенный тег."""
+        template = Template(
+            '{% load coalesced_cache %}'
+            '{% cache 60 fragment name %}{{ value }}{% endcache %}'
+        )
+        first = template.render(Context({'name': 'a', 'value': 1}))
+        second = template.render(Context({'name': 'a', 'value': 2}))
+        other = template.render(Context({'name': 'b', 'value': 3}))
+        self.assertEqual((first, second, other), ('1', '1', '3'))
+        self.assertIsNotNone(
+            cache.get(make_template_fragment_key('fragment', ['a']))
+        )
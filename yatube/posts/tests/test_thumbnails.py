@@ -0,0 +1,142 @@
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('thumb.gif', SMALL_GIF, 'image/gif')
+        )
+        cls.post_url = reverse('Posts:post_detail', kwargs={
+            'post_id': cls.post.pk
+        })
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_page_does_not_resize_inline(self):
+        """Без готовой миниатюры страница выводит заглушку."""
+        with mock.patch.object(
+            thumbnails.backend, '_create_thumbnail'
+        ) as create:
+            content = self.client.get(self.post_url).content.decode()
+        create.assert_not_called()
+        self.assertNotIn('/media/cache/', content)
+        self.assertIn('bg-light', content)
+
+    def test_pregenerated_thumbnail_rendered(self):
+        """Подготовленная миниатюра выводится на странице."""
+        thumbnails.generate(self.post.image.name)
+        content = self.client.get(self.post_url).content.decode()
+        self.assertIn('<img src="/media/cache/', content)
+
+    def test_generated_thumbnail_replaces_cached_placeholder(self):
+        """Готовая миниатюра сразу видна и на закешированной странице."""
+        self.assertNotIn('/media/cache/', self.client.get(
+            self.post_url
+        ).content.decode())
+        thumbnails.generate(self.post.image.name)
+        self.assertIn('<img src="/media/cache/', self.client.get(
+            self.post_url
+        ).content.decode())
+
+    def test_post_create_enqueues_thumbnails(self):
+        """Создание поста с картинкой ставит миниатюры в очередь."""
+        self.client.post(reverse('Posts:post_create'), {
+            'text': 'Новый пост',
+            'image': SimpleUploadedFile('new.gif', SMALL_GIF, 'image/gif'),
+        })
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'posts.thumbnails.generate')
+        self.assertEqual(json.loads(job.payload)['args'], ['posts/new.gif'])
+
+    def test_post_purge_removes_files(self):
+        """Очистка удаленного поста удаляет картинку и миниатюры."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост на удаление',
+            image=SimpleUploadedFile('gone.gif', SMALL_GIF, 'image/gif')
+        )
+        thumbnails.generate(post.image.name)
+        thumbnail = thumbnails.cached_thumbnail(post.image, 'card')
+        self.client.post(
+            reverse('Posts:post_del', kwargs={'post_id': post.pk})
+        )
+        jobs.run(Job.objects.get(name='posts.purge.purge_post'))
+        self.assertFalse(default_storage.exists(post.image.name))
+        self.assertFalse(default_storage.exists(thumbnail.name))
+
+    def test_backfill_command_enqueues_missing(self):
+        """generate_thumbnails ставит в очередь картинки без миниатюр."""
+        call_command('generate_thumbnails', stdout=io.StringIO())
+        self.assertEqual(Job.objects.count(), 1)
+        Job.objects.all().delete()
+        thumbnails.generate(self.post.image.name)
+        call_command('generate_thumbnails', stdout=io.StringIO())
+        self.assertFalse(Job.objects.exists())
+
+    def test_backfill_requeues_finished_jobs(self):
+        """--all повторяет выполненные задачи и считает только новые."""
+        call_command('generate_thumbnails', stdout=io.StringIO())
+        jobs.run(Job.objects.get())
+        for expected in (1, 0):
+            with self.subTest(expected=expected):
+                out = io.StringIO()
+                call_command('generate_thumbnails', '--all', stdout=out)
+                self.assertIn(f'картинок: {expected}', out.getvalue())
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    def test_lookup_name_matches_sorl(self):
+        """Имя для поиска совпадает с именем, которое создает sorl."""
+        for geometry, options in settings.POST_THUMBNAILS.values():
+            with self.subTest(geometry=geometry):
+                created = thumbnails.backend.get_thumbnail(
+                    self.post.image.name, geometry, **options
+                )
+                self.assertEqual(
+                    thumbnails.backend.thumbnail_name(
+                        self.post.image.name, geometry, **options
+                    ),
+                    created.name
+                )
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, Timeline, UserStats
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки'
+        )
+        cls.follow_url = reverse('Posts:profile_follow', kwargs={
+            'username': cls.author.username
+        })
+        cls.unfollow_url = reverse('Posts:profile_unfollow', kwargs={
+            'username': cls.author.username
+        })
+        cls.follow_index_url = reverse('Posts:follow_index')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self):
+        response = self.reader_client.get(self.follow_index_url)
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """Подписка переносит в ленту уже опубликованные посты автора."""
+        self.reader_client.get(self.follow_url)
+        self.assertEqual(self.feed(), [self.old_post])
+
+    def test_new_post_fanned_out(self):
+        """Новый пост автора попадает в ленты подписчиков при записи."""
+        self.reader_client.get(self.follow_url)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_unfollow_trims_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        self.reader_client.get(self.follow_url)
+        self.reader_client.get(self.unfollow_url)
+        self.assertFalse(Timeline.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_pulled_on_read(self):
+        """Посты популярного автора подтягиваются в ленту при чтении."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.filter(user=self.author).update(followers_count=1)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(Timeline.objects.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_authors_pulled_only_after_new_posts(self):
+        """Без новых постов популярных авторов чтение ленты их не ищет."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.filter(user=self.author).update(followers_count=1)
+        timeline.pull_popular(self.reader)
+        with self.assertNumQueries(0):
+            timeline.pull_popular(self.reader)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        timeline.pull_popular(self.reader)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.reader, post=post).exists()
+        )
@@ -10,6 +10,7 @@ from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Comment, Follow, Group, Post
+from .utils import run_on_commit
 
 User = get_user_model()
 POST_IN_FIRST_PAGE = 10
@@ -96,6 +97,7 @@ class BaseViewsTest(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.other_user = User.objects.create_user(username='other_user')
         self.guest_client = Client()
         self.authorized_client = Client()
@@ -144,6 +146,50 @@ class PaginatorViewsTest(BaseViewsTest):
             len_cont = len(response.context['page_obj'])
             self.assertEqual(len_cont, created_post - POST_IN_FIRST_PAGE)
 
+    def test_paginator_cursor(self):
+        """Тест паджинатора: переход по токенам вперед и назад."""
+        for address in self.have_paginator:
+            with self.subTest(address=address):
+                first = self.authorized_client_other.get(address)
+                first_page = first.context['page_obj']
+                second = self.authorized_client_other.get(
+                    address, {'cursor': first_page.next_cursor}
+                )
+                second_page = second.context['page_obj']
+                self.assertEqual(second_page.number, 2)
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    len(second_page), Post.objects.count() - POST_IN_FIRST_PAGE
+                )
+                self.assertFalse(
+                    set(first_page.object_list)
+                    & set(second_page.object_list)
+                )
+                back = self.authorized_client_other.get(
+                    address, {'cursor': second_page.previous_cursor}
+                )
+                self.assertEqual(
+                    back.context['page_obj'].object_list,
+                    first_page.object_list
+                )
+
+    def test_paginator_bad_cursor(self):
+        """Тест паджинатора: неверный токен ведет на первую страницу."""
+        response = self.guest_client.get(self.index_url, {'cursor': 'xyz'})
+        self.assertEqual(response.context['page_obj'].number, 1)
+        self.assertEqual(len(response.context['page_obj']), POST_IN_FIRST_PAGE)
+
+    def test_paginator_page_past_end(self):
+        """Тест паджинатора: номер за концом ведет на последнюю страницу."""
+        response = self.guest_client.get(self.index_url, {'page': 99})
+        page = response.context['page_obj']
+        self.assertEqual(page.number, 2)
+        self.assertEqual(
+            len(page), Post.objects.count() - POST_IN_FIRST_PAGE
+        )
+        self.assertIsNotNone(page.previous_cursor)
+        self.assertNotContains(response, 'cursor=None')
+
 
 class PostViewsContextTest(BaseViewsTest):
     """Тестирование контекста в HTML-шаблонах."""
@@ -246,6 +292,137 @@ class PostViewsCacheTest(BaseViewsTest):
         response_clear = self.authorized_client.get(get_content)
         self.assertNotEqual(response, response_clear)
 
+    def test_index_cache_keeps_fragment(self):
+        """Фрагмент index берется из кеша, пока посты не менялись."""
+        cache.clear()
+        self.guest_client.get(self.index_url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        content = self.guest_client.get(self.index_url).content.decode()
+        self.assertIn(self.post.text, content)
+
+    def test_index_cache_per_page(self):
+        """Каждая страница index кешируется отдельно."""
+        cache.clear()
+        for i in range(POST_IN_FIRST_PAGE):
+            Post.objects.create(author=self.user, text=f'Пост №{i}')
+        first = self.guest_client.get(self.index_url).content.decode()
+        second = self.guest_client.get(
+            self.index_url, {'page': 2}
+        ).content.decode()
+        self.assertNotIn(self.post.text, first)
+        self.assertIn(self.post.text, second)
+
+    def test_index_cache_invalidated_by_new_post(self):
+        """Новый пост сразу виден на index, несмотря на кеш."""
+        cache.clear()
+        self.guest_client.get(self.index_url)
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Свежий пост')
+        content = self.guest_client.get(self.index_url).content.decode()
+        self.assertIn('Свежий пост', content)
+
+
+class PageCacheTest(BaseViewsTest):
+    """Кеш страниц целиком и персональные фрагменты в нем."""
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_anonymous_page_served_without_render(self):
+        """Повторный анонимный запрос отдается из кеша без шаблонов."""
+        first = self.guest_client.get(self.post_detail_url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(self.post_detail_url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.templates, [])
+
+    def test_cached_page_filled_for_each_user(self):
+        """Шапка и кнопка подписки подставляются для каждого пользователя."""
+        self.guest_client.get(self.profile_url)
+        own = self.authorized_client.get(self.profile_url)
+        other = self.authorized_client_other.get(self.profile_url)
+        self.assertNotIn(
+            'posts/profile.html',
+            [template.name for template in other.templates]
+        )
+        self.assertContains(own, 'Пользователь: test_user')
+        self.assertNotContains(own, self.profile_follow_url)
+        self.assertContains(other, 'Пользователь: other_user')
+        self.assertContains(other, self.profile_follow_url)
+
+    def test_personal_fragments_not_shared(self):
+        """Форма комментария и кнопки автора не попадают к анонимам."""
+        self.authorized_client.get(self.post_detail_url)
+        response = self.guest_client.get(self.post_detail_url)
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, self.post_edit_url)
+        self.assertContains(response, 'Войти')
+
+    def test_new_comment_invalidates_page(self):
+        """Новый комментарий сразу виден на закешированной странице."""
+        self.guest_client.get(self.post_detail_url)
+        with run_on_commit():
+            Comment.objects.create(
+                post=self.post, author=self.user, text='Свежий комментарий'
+            )
+        response = self.guest_client.get(self.post_detail_url)
+        self.assertContains(response, 'Свежий комментарий')
+
+
+class ConditionalGetTest(BaseViewsTest):
+    """Условный GET страниц постов."""
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_not_modified_without_render(self):
+        """Совпавший ETag дает 304 без рендеринга шаблонов."""
+        for url in (self.index_url, self.group_url,
+                    self.profile_url, self.post_detail_url):
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_etag_is_the_only_validator(self):
+        """Last-Modified не отдается, If-Modified-Since не дает 304."""
+        response = self.guest_client.get(self.index_url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = self.guest_client.get(
+            self.index_url,
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_content(self):
+        """Новый пост меняет ETag."""
+        etag = self.guest_client.get(self.index_url)['ETag']
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(
+            self.index_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_etag_changes_with_follow(self):
+        """Подписка меняет ETag страницы автора только для подписчика."""
+        etag = self.authorized_client_other.get(self.profile_url)['ETag']
+        guest_etag = self.guest_client.get(self.profile_url)['ETag']
+        self.authorized_client_other.get(self.profile_follow_url)
+        response = self.authorized_client_other.get(
+            self.profile_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.profile_unfollow_url)
+        response = self.guest_client.get(
+            self.profile_url, HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, 304)
+
 
 class PostViewsFollowTest(BaseViewsTest):
     """Тестирование возможности подписки и отписки от авторов."""
@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка, что страница укладывается в заданное число SQL-запросов."""
+
+    def assertQueryBudget(self, client, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        executed = [query['sql'] for query in queries.captured_queries]
+        self.assertLessEqual(
+            len(executed),
+            budget,
+            f'{url}: {len(executed)} запросов при бюджете {budget}:\n'
+            + '\n'.join(executed)
+        )
+        return response
+
+
+@contextmanager
+def run_on_commit():
+    """
+    Выполняет on_commit-колбэки, отложенные внутри блока.
+
+    TestCase не коммитит свою транзакцию, поэтому без этого сброс версий
+    (posts.caching.bump_on_commit) в тестах не случился бы. То же, что
+    captureOnCommitCallbacks(execute=True) из Django 3.2.
+    """
+    start = len(connection.run_on_commit)
+    try:
+        yield
+    finally:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, callback in callbacks:
+            callback()
@@ -0,0 +1,120 @@
+"""
+Фоновая подготовка миниатюр картинок постов.
+
+Шаблоны никогда не вызывают Pillow: они берут миниатюру только из
+хранилища ключей sorl, а пока ее нет, выводят заглушку. Все нужные
+шаблонам размеры перечислены в settings.POST_THUMBNAILS и готовятся
+задачей очереди core.jobs сразу после сохранения поста, а для
+картинок, загруженных раньше, — командой generate_thumbnails.
+"""
+import threading
+
+from django.conf import settings
+from sorl.thumbnail import default, delete
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import enqueue, task
+from .caching import bump_feed_version
+from .models import Post
+from .signals import post_scopes
+
+
+class _Named(Exception):
+    def __init__(self, name):
+        super().__init__(name)
+        self.name = name
+
+
+class PregeneratedBackend(ThumbnailBackend):
+    """
+    Бэкенд sorl, умеющий искать готовую миниатюру без генерации.
+
+    Имя миниатюры считает сам get_thumbnail со своим разбором опций;
+    в режиме поиска он прерывается сразу после расчета имени.
+    """
+    _lookup = threading.local()
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        name = super()._get_thumbnail_filename(
+            source, geometry_string, options
+        )
+        if getattr(self._lookup, 'active', False):
+            raise _Named(name)
+        return name
+
+    def thumbnail_name(self, file_, geometry_string, **options):
+        """Имя файла миниатюры, как его посчитает sorl."""
+        self._lookup.active = True
+        try:
+            self.get_thumbnail(file_, geometry_string, **options)
+        except _Named as named:
+            return named.name
+        finally:
+            self._lookup.active = False
+        raise RuntimeError('sorl не посчитал имя миниатюры')
+
+    def get_cached(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища ключей или None."""
+        name = self.thumbnail_name(file_, geometry_string, **options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = PregeneratedBackend()
+
+
+def cached_thumbnail(image, variant):
+    """Миниатюра картинки поста нужного размера, если она уже готова."""
+    if not image:
+        return None
+    geometry, options = settings.POST_THUMBNAILS[variant]
+    return backend.get_cached(image, geometry, **options)
+
+
+@task()
+def generate(name):
+    """
+    Готовит все размеры миниатюр для файла картинки.
+
+    Закешированные страницы с постами этой картинки показывают заглушку,
+    поэтому их версии сбрасываются.
+    """
+    for geometry, options in settings.POST_THUMBNAILS.values():
+        backend.get_thumbnail(name, geometry, **options)
+    scopes = set()
+    for post in Post.objects.filter(image=name).only(
+        'pk', 'author_id', 'group_id'
+    ):
+        scopes.update(post_scopes(post))
+    if scopes:
+        bump_feed_version(*scopes)
+
+
+def delete_files(name):
+    """Удаляет картинку и ее миниатюры, если она больше не нужна постам."""
+    if not Post.objects.filter(image=name).exists():
+        delete(name)
+
+
+def is_missing(post):
+    """Нет хотя бы одного из размеров миниатюры картинки поста."""
+    return any(
+        cached_thumbnail(post.image, variant) is None
+        for variant in settings.POST_THUMBNAILS
+    )
+
+
+def enqueue_generate(post, requeue=False):
+    """
+    Ставит подготовку миниатюр картинки поста в очередь.
+
+    requeue=True повторяет уже выполненную задачу (например, если
+    миниатюры с тех пор пропали). Возвращает True, если в очереди
+    появилась новая задача.
+    """
+    if not post.image:
+        return False
+    name = post.image.name
+    return enqueue(
+        generate, name, key=f'thumbnails:{post.pk}:{name}', requeue=requeue
+    ).enqueued
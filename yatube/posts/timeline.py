@@ -0,0 +1,132 @@
+"""
+Лента подписок с разносом постов при записи (fan-out on write).
+
+Новый пост сразу попадает в ленты подписчиков автора. Для авторов,
+у которых подписчиков больше TIMELINE_FANOUT_LIMIT, разнос при записи
+слишком дорог: их посты подтягиваются в ленту читателя при чтении,
+но только если с прошлого чтения у популярных авторов были новые посты.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Follow, Post, Timeline, UserStats
+
+POPULAR_VERSION_KEY = 'timeline:popular_version'
+PULLED_KEY = 'timeline:pulled:{}'
+
+
+def get_popular_version():
+    """Версия постов, пропущенных при разносе; растет с каждым таким постом."""
+    # Как и версии posts.caching: после очистки кеша не меньше прежней.
+    cache.add(POPULAR_VERSION_KEY, time.time_ns(), None)
+    return cache.get(POPULAR_VERSION_KEY)
+
+
+def bump_popular_version():
+    try:
+        cache.incr(POPULAR_VERSION_KEY)
+    except ValueError:
+        get_popular_version()
+
+
+def _entries(user_ids, posts):
+    return [
+        Timeline(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in user_ids
+        for post in posts
+    ]
+
+
+def fan_out(post):
+    """Добавляет пост в ленты всех подписчиков автора."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    follower_ids = list(
+        Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True)[:limit + 1]
+    )
+    if not follower_ids:
+        return
+    if len(follower_ids) > limit:
+        bump_popular_version()
+        return
+    Timeline.objects.bulk_create(
+        _entries(follower_ids, [post]), ignore_conflicts=True
+    )
+
+
+def backfill(user, author, since=None):
+    """Переносит в ленту последние посты автора после подписки."""
+    posts = Post.objects.visible().filter(author=author).only(
+        'pk', 'author_id', 'pub_date'
+    )
+    if since is not None:
+        posts = posts.filter(pub_date__gt=since)
+    posts = posts.order_by('-pub_date', '-pk')
+    Timeline.objects.bulk_create(
+        _entries([user.pk], posts[:settings.TIMELINE_BACKFILL_LIMIT]),
+        ignore_conflicts=True
+    )
+
+
+def trim(user, author):
+    """Убирает посты автора из ленты после отписки."""
+    Timeline.objects.filter(user=user, author=author).delete()
+
+
+def pull_popular(user):
+    """
+    Подтягивает в ленту новые посты популярных авторов (fan-out on read).
+
+    Разнос таких постов при записи пропускается, поэтому перед чтением
+    ленты догружаем всё, что новее последней записи этого автора в ленте.
+    Пока таких постов не появлялось, чтение ленты обходится без запросов.
+    """
+    version = get_popular_version()
+    pulled_key = PULLED_KEY.format(user.pk)
+    if cache.get(pulled_key) == version:
+        return
+    followed = Follow.objects.filter(user=user).values('author')
+    popular = list(
+        UserStats.objects.filter(
+            user__in=followed,
+            followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+        ).values_list('user', flat=True)
+    )
+    if not popular:
+        cache.set(pulled_key, version, None)
+        return
+    latest = dict(
+        Timeline.objects.filter(
+            user=user, author__in=popular
+        ).values('author').annotate(
+            latest=Max('pub_date')
+        ).values_list('author', 'latest')
+    )
+    for author_id in popular:
+        backfill(user, author_id, since=latest.get(author_id))
+    cache.set(pulled_key, version, None)
+
+
+def feed(user):
+    """Записи ленты подписок пользователя: только ключи для паджинации."""
+    pull_popular(user)
+    return Timeline.objects.filter(user=user).only('pub_date', 'post_id')
+
+
+def posts_for(entries):
+    """Посты для страницы ленты одним запросом, в порядке записей."""
+    posts = Post.objects.for_feed().in_bulk(
+        [entry.post_id for entry in entries]
+    )
+    return [
+        posts[entry.post_id] for entry in entries if entry.post_id in posts
+    ]
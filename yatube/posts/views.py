@@ -1,35 +1,62 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
+
+from core.db_router import read_from_replica
+from core.page_cache import cached_page
+from core.paginator import KeysetPaginator
+from . import counters, export, purge, search, thumbnails, timeline
+from .caching import (
+    author_version, conditional_page, group_version, index_version,
+    post_version, touch_user,
+)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post
 
 
 User = get_user_model()
+COMMENT_KEYS = ('-created', '-pk')
 
 
-def call_paginator(post_list, request, post_in_page=10):
-    paginator = Paginator(post_list, post_in_page)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+def call_paginator(post_list, request, post_in_page=10,
+                   keys=('-pub_date', '-pk')):
+    paginator = KeysetPaginator(post_list, post_in_page, keys=keys)
+    return paginator.get_page(
+        request.GET.get('page'),
+        cursor=request.GET.get('cursor')
+    )
 
 
+@read_from_replica
+@conditional_page(index_version)
+@cached_page(index_version)
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     title = 'Последние обновления на сайте'
     context = {
         'page_obj': call_paginator(post_list, request),
         'title': title,
+        'feed_version': index_version(),
+        'cache_timeout': settings.INDEX_CACHE_TIMEOUT,
     }
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page(group_version)
+@cached_page(group_version)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    post_list = group.posts.for_feed()
     context = {
         'group': group,
         'page_obj': call_paginator(post_list, request),
@@ -37,37 +64,102 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@read_from_replica
+@conditional_page(author_version)
+@cached_page(author_version)
 def profile(request, username):
     template = 'posts/profile.html'
-    profile = get_object_or_404(User, username=username)
-    post_list = profile.posts.all()
-    following = False
-    if request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=profile
-    ).exists():
-        following = True
+    profile = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    post_list = profile.posts.for_feed()
     context = {
         'profile': profile,
-        'following': following,
         'page_obj': call_paginator(post_list, request)
     }
     return render(request, template, context)
 
 
+@login_required
+def profile_export(request, username):
+    """Потоковая выгрузка истории автора: ?format=ndjson или csv."""
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.FORMATS:
+        raise Http404(f'Неизвестный формат выгрузки: {export_format}')
+    response = StreamingHttpResponse(
+        export.export(author, export_format),
+        content_type=export.FORMATS[export_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{export_format}"'
+    )
+    return response
+
+
+def post_search(request):
+    '''Полнотекстовый поиск по постам.'''
+    query = request.GET.get('q', '').strip()
+    page_obj = call_paginator(
+        search.search(query),
+        request,
+        keys=('rank', 'post_id')
+    )
+    for result in page_obj:
+        result.snippet = search.highlight(result.snippet_source)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'paginator_query': urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@read_from_replica
+@conditional_page(post_version)
+@cached_page(post_version)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.visible().select_related('author__stats', 'group'),
+        pk=post_id
+    )
     form = CommentForm(request.POST or None)
-    coments_list = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': coments_list
+        'comments': comments_paginator(post).page(1),
     }
     return render(request, template, context)
 
 
+def comments_paginator(post):
+    """Комментарии поста страницами по ключу (created, pk)."""
+    return KeysetPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        keys=COMMENT_KEYS
+    )
+
+
+@conditional_page(post_version)
+@cached_page(post_version)
+def post_comments(request, post_id):
+    """Следующая страница комментариев: HTML-фрагмент для подгрузки."""
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
+    comments = comments_paginator(post).get_page(
+        cursor=request.GET.get('cursor')
+    )
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
     template = 'posts/create_post.html'
@@ -82,13 +174,17 @@ def post_create(request):
         return render(request, template, {'form': form, 'is_edit': False})
     post = form.save(commit=False)
     post.author = request.user
-    form.save()
+    with transaction.atomic():
+        form.save()
+        counters.post_added(post)
+        thumbnails.enqueue_generate(post)
     return redirect('Posts:profile', request.user)
 
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
+    old_group_id = post.group_id
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -106,38 +202,55 @@ def post_edit(request, post_id):
         return render(request, template, context)
     if not form.is_valid():
         return render(request, template, context)
-    form.save()
+    with transaction.atomic():
+        form.save()
+        counters.post_moved(post, old_group_id)
+        if 'image' in form.changed_data:
+            thumbnails.enqueue_generate(post)
     return redirect('Posts:post_detail', post_id)
 
 
+@require_POST
+@login_required
 def post_del(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    post.delete()
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
+    if post.author != request.user:
+        return redirect('Posts:post_detail', post.pk)
+    with transaction.atomic():
+        purge.soft_delete(post)
     return redirect('Posts:profile', request.user)
 
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            counters.comment_added(comment)
         return redirect('Posts:post_detail', post_id)
     return redirect('Posts:post_detail', post_id)
 
 
+@read_from_replica
 @login_required
 def follow_index(request):
     '''
     Выводит посты авторов
     на которых подписан текущий пользователь.
     '''
-    post_list = Post.objects.filter(author__following__user=request.user)
+    page_obj = call_paginator(
+        timeline.feed(request.user),
+        request,
+        keys=('-pub_date', '-post_id')
+    )
+    page_obj.object_list = timeline.posts_for(page_obj)
     context = {
-        'page_obj': call_paginator(post_list, request),
+        'page_obj': page_obj,
         'title': 'Избранные авторы',
     }
     return render(request, 'posts/follow.html', context)
@@ -148,13 +261,20 @@ def profile_follow(request, username):
     '''Функция подписки на автора.'''
     author = get_object_or_404(User, username=username)
     follower = request.user
-    follower_list = Follow.objects.filter(author=author, user=follower)
-    if follower_list.exists() or follower == author:
+    if follower == author:
         return redirect('Posts:index')
-    Follow.objects.create(
-        author=author,
-        user=follower
-    )
+    # Один INSERT: повторную подписку отсекает уникальное ограничение,
+    # без гонки между проверкой exists() и create().
+    try:
+        with transaction.atomic():
+            Follow.objects.create(author=author, user=follower)
+            counters.follow_added(follower, author)
+    except IntegrityError:
+        return redirect('Posts:index')
+    # Кнопка подписки меняется только на страницах подписчика. Без
+    # сигнала на Follow: он отключил бы быстрое удаление при отписке.
+    touch_user(follower.pk)
+    timeline.backfill(follower, author)
     return redirect('Posts:profile', username)
 
 
@@ -163,8 +283,14 @@ def profile_unfollow(request, username):
     '''Функция отписки от автора.'''
     author = get_object_or_404(User, username=username)
     follower = request.user
-    follower_list = Follow.objects.filter(author=author, user=follower)
-    if not follower_list.exists():
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            author=author, user=follower
+        ).delete()
+        if deleted:
+            counters.follow_removed(follower, author)
+    if not deleted:
         return redirect('Posts:index')
-    follower_list.delete()
+    touch_user(follower.pk)
+    timeline.trim(follower, author)
     return redirect('Posts:profile', username)
@@ -0,0 +1,20 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no native ASGI support, so the WSGI application runs in
+a thread pool behind core.asgi.AsgiHandler.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = AsgiHandler(
+    get_wsgi_application(), max_workers=settings.ASGI_THREADS
+)
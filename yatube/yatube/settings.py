@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -28,10 +30,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -51,7 +56,8 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to core.metrics
+        'BACKEND': 'core.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,13 +72,47 @@ TEMPLATES = [
     },
 ]
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# yatube.asgi runs Django in a thread pool of this size
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Each worker thread keeps its connection between requests
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
     }
 }
+# Applied to every new SQLite connection (core.sqlite): WAL lets feed
+# readers run while a comment is being written
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative means KiB: 64 MB of page cache per connection
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+# Read replicas (core.db_router). DATABASE_REPLICAS=2 adds the SQLite
+# files db_replica1.sqlite3 and db_replica2.sqlite3 as local stand-ins,
+# refreshed from the primary with manage.py sync_replicas
+DATABASE_REPLICAS = [
+    f'replica{number}'
+    for number in range(1, int(os.getenv('DATABASE_REPLICAS', 0)) + 1)
+]
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias in DATABASE_REPLICAS
+})
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# After any write the user reads from the primary for this many seconds
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,12 +153,93 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-# Page cache
+# Subscriptions feed: authors with more followers than this are not
+# fanned out on write, their posts are pulled into the feed on read
+TIMELINE_FANOUT_LIMIT = 1000
+# How many recent posts of an author are copied into a feed on follow
+TIMELINE_BACKFILL_LIMIT = 500
+
+# Thumbnail variants used by templates: name -> (geometry, sorl options).
+# They are generated by a queued job right after a post is saved
+POST_THUMBNAILS = {
+    'card': ('400x400', {'crop': 'center', 'upscale': True}),
+}
+
+# Background job queue (core.jobs), run with manage.py runworker
+JOBS_PROCESSES = 1
+JOBS_THREADS = 2
+JOBS_MAX_ATTEMPTS = 5
+# Retry delay in seconds doubles on every attempt, up to the maximum
+JOBS_BACKOFF = 10
+JOBS_BACKOFF_MAX = 60 * 60
+# A running job not finished in this many seconds is taken back
+JOBS_LOCK_TIMEOUT = 60 * 10
+JOBS_RETENTION = 60 * 60 * 24 * 7
+# Comments of a deleted post are removed by the purge job in batches
+PURGE_BATCH_SIZE = 500
+
+# Page cache and content versions. sqlite is one file shared by all
+# processes of the host (see core.cache), so a write invalidates pages in
+# every worker. locmem is private to each process: opt in with
+# CACHE_BACKEND=locmem only for a single-process run. Tests use it by
+# default, since they clear the cache and must not touch the shared file
+# The backends are subclasses from core.metrics that count cache hits and
+# misses of a request
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.metrics.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.metrics.SQLiteCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'yatube_cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 64 * 1024 * 1024,
+        },
+    },
+}
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[
+        os.getenv('CACHE_BACKEND', 'locmem' if TESTING else 'sqlite')
+    ],
 }
+# Cached index fragments are keyed on the feed version, which is bumped
+# on every change, so they can live for hours
+INDEX_CACHE_TIMEOUT = 60 * 60 * 3
+PAGE_CACHE_TIMEOUT = 60 * 60 * 3
+# post_detail renders only the first page of comments, the rest are
+# loaded as fragments from posts/<id>/comments/?cursor=...
+COMMENTS_PER_PAGE = 20
+
+# History export (posts.export): rows fetched from the database at a time
+# and characters sent to the client in one chunk
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+# RSS/Atom feeds (posts.feeds): posts per feed
+FEED_ITEMS = 20
+# Read-only JSON API (api/v1/): default and maximum ?limit= of a page
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+# Stampede protection (core.stampede): only the request holding the lock
+# recomputes an expired value, others get the stale one or wait up to
+# STAMPEDE_WAIT seconds. A larger STAMPEDE_BETA recomputes earlier
+STAMPEDE_BETA = 1.0
+STAMPEDE_LOCK_TIMEOUT = 30
+STAMPEDE_WAIT = 2.0
+
+# Per-view request metrics, shared by all worker processes through
+# a memory-mapped file; delete the file to reset them
+METRICS_FILE = os.getenv(
+    'METRICS_FILE', os.path.join(tempfile.gettempdir(), 'yatube_metrics')
+)
+METRICS_SLOTS = 128
+# /metrics/ requires the header "Authorization: Bearer <METRICS_TOKEN>"
+# (bearer_token in the Prometheus scrape config); closed when it is empty
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 
 if DEBUG:
     import logging